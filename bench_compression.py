@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Benchmark of the light link json compressions. Generates a large light
+    link file and writes it with each compression, indented and compact,
+    then prints the bytes on disk and the write and load times:
+    python bench_compression.py
+    python bench_compression.py --assets 100000 --lights 200 --runs 5
+
+    lzma is skipped when neither lzma nor backports.lzma can be imported
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+# custom
+import light_link_object as llo
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+DEFAULT_ASSETS = 50000
+DEFAULT_LIGHTS = 100
+DEFAULT_RUNS = 3
+
+# Fraction of the assets linked to each light
+LINK_RATIO = 0.3
+
+COMPRESSIONS = [llo.NO_COMPRESSION,
+                llo.GZIP_COMPRESSION,
+                llo.BZ2_COMPRESSION,
+                llo.LZMA_COMPRESSION]
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def generate_links(asset_count, light_count, seed = 0):
+    """
+    Returns light link json data with asset names like a real show's
+    """
+    rand = random.Random(seed)
+    asset_types = ['chr', 'prp', 'env', 'veh', 'fx']
+    assets = ['{0}_asset{1:05d}_geo'.format(rand.choice(asset_types), i)
+              for i in range(asset_count)]
+
+    links = {}
+    link_size = int(asset_count * LINK_RATIO)
+    for i in range(light_count):
+        link_assets = rand.sample(assets, link_size)
+        links['light_{0:03d}'.format(i)] = {llo.ASSETS_TAG: link_assets}
+    return {llo.ASSETS_TAG: assets, llo.LIGHTLINK_TAG: links}
+
+def get_compressions():
+    """
+    Returns the compressions that can be used here
+    """
+    return [compression for compression in COMPRESSIONS
+            if compression != llo.LZMA_COMPRESSION or llo.lzma is not None]
+
+def time_call(function, runs):
+    """
+    Returns the fastest time in seconds of a number of calls
+    """
+    times = []
+    for i in range(runs):
+        start = time.time()
+        function()
+        times.append(time.time() - start)
+    return min(times)
+
+def bench_compression(data, json_path, compression, compact, runs):
+    """
+    Returns the bytes on disk, write and load seconds of a compression
+    """
+    write_time = time_call(lambda: llo.write_json(json_path, data,
+                                                  compression, compact),
+                           runs)
+    size = os.path.getsize(json_path)
+    load_time = time_call(lambda: llo.read_json(json_path), runs)
+    return size, write_time, load_time
+
+def main():
+    """
+    Runs the compression benchmark on a generated light link file
+    """
+    parser = argparse.ArgumentParser(description = 'Light link json '
+                                                   'compression benchmark')
+    parser.add_argument('--assets', type = int, default = DEFAULT_ASSETS)
+    parser.add_argument('--lights', type = int, default = DEFAULT_LIGHTS)
+    parser.add_argument('--runs', type = int, default = DEFAULT_RUNS)
+    args = parser.parse_args()
+
+    data = generate_links(args.assets, args.lights)
+    print 'Light links: {0} assets, {1} lights, best of {2} runs'\
+          .format(args.assets, args.lights, args.runs)
+    print '{0:<8}{1:<10}{2:>14}{3:>8}{4:>10}{5:>10}'.format(
+                        'codec', 'format', 'bytes', 'ratio', 'write s',
+                        'load s')
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        json_path = os.path.join(temp_dir, 'lightlinks.json')
+        base_size = None
+        for compression in get_compressions():
+            for compact in (False, True):
+                size, write_time, load_time = bench_compression(
+                                    data, json_path, compression, compact,
+                                    args.runs)
+                if base_size is None:
+                    base_size = size
+                print '{0:<8}{1:<10}{2:>14,}{3:>8.2f}{4:>10.3f}{5:>10.3f}'\
+                      .format(compression,
+                              'compact' if compact else 'indent',
+                              size, float(base_size) / size,
+                              write_time, load_time)
+    finally:
+        shutil.rmtree(temp_dir)
+
+if __name__ == '__main__':
+    main()
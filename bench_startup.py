@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Benchmark of the import time of the light link modules, which is what
+    opening the tool or loading the node plugin waits for before any
+    light links are read. Maya and PyQt4 are replaced by empty stand in
+    modules, so only the cost of our own modules is timed and the script
+    runs outside of Maya
+
+    Each import is timed in a new python process, as modules imported
+    once stay imported:
+    python bench_startup.py
+    python bench_startup.py --runs 20 light_linker_ui
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import argparse
+import os
+import subprocess
+import sys
+import time
+import types
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+DEFAULT_RUNS = 10
+
+BENCH_MODULES = ['light_link_search',
+                 'light_link_scene',
+                 'light_link_object',
+                 'light_link_shards',
+                 'light_link_sqlite',
+                 'light_link_export',
+                 'light_link_prefetch',
+                 'light_link_node',
+                 'light_linker_ui']
+
+STUB_MODULES = {'maya': ['OpenMaya', 'OpenMayaMPx', 'cmds'],
+                'PyQt4': ['QtCore', 'QtGui']}
+
+# Names the ui module takes from PyQt4.QtCore with a star import
+QTCORE_NAMES = ['QAbstractItemModel', 'QAbstractListModel', 'QItemSelection',
+                'QItemSelectionModel', 'QModelIndex', 'QRegExp', 'QThread',
+                'QVariant', 'Qt', 'pyqtSignal']
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def install_stubs():
+    """
+    Adds stand in maya and PyQt4 modules to sys.modules
+    """
+    for package_name, module_names in STUB_MODULES.iteritems():
+        package = StubModule(package_name)
+        sys.modules[package_name] = package
+        for module_name in module_names:
+            full_name = '{0}.{1}'.format(package_name, module_name)
+            module = StubModule(full_name)
+            setattr(package, module_name, module)
+            sys.modules[full_name] = module
+    sys.modules['PyQt4.QtCore'].__all__ = QTCORE_NAMES
+
+def time_import(module_name):
+    """
+    Imports a module with the stubs installed and returns the seconds
+    taken and whether it pulled in the light link reader
+    """
+    install_stubs()
+    start = time.time()
+    __import__(module_name)
+    seconds = time.time() - start
+    return seconds, 'light_link_object' in sys.modules
+
+def run_import(module_name):
+    """
+    Times the import of a module in a new python process
+    """
+    script_path = os.path.abspath(__file__)
+    output = subprocess.check_output([sys.executable, script_path,
+                                      '--child', module_name],
+                                     cwd = os.path.dirname(script_path))
+    seconds, reader_loaded = output.split()
+    return float(seconds), reader_loaded == 'True'
+
+def bench_module(module_name, runs):
+    """
+    Prints the fastest and median import time of a module
+    """
+    times = []
+    reader_loaded = False
+    for i in range(runs):
+        seconds, reader_loaded = run_import(module_name)
+        times.append(seconds)
+    times.sort()
+    print '{0:<22}{1:>10.2f}{2:>10.2f}  {3}'.format(module_name,
+                                                  times[0] * 1000,
+                                                  times[len(times) // 2] *
+                                                  1000,
+                                                  'yes' if reader_loaded
+                                                  else 'no')
+
+def main():
+    """
+    Runs the import benchmark of the given or all light link modules
+    """
+    parser = argparse.ArgumentParser(description = 'Light link import '
+                                                   'time benchmark')
+    parser.add_argument('modules', nargs = '*', default = BENCH_MODULES)
+    parser.add_argument('--runs', type = int, default = DEFAULT_RUNS)
+    parser.add_argument('--child', action = 'store_true',
+                        help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        seconds, reader_loaded = time_import(args.modules[0])
+        print seconds, reader_loaded
+        return
+
+    print '{0:<22}{1:>10}{2:>10}  {3}'.format('module', 'min ms',
+                                              'median ms', 'reader')
+    for module_name in args.modules:
+        bench_module(module_name, args.runs)
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ CLASSES --#
+
+class StubType(type):
+    """
+    Class of the stand in classes, any class attribute is another stand in
+    """
+    def __getattr__(cls, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return StubType(name, (StubClass,), {})
+
+class StubClass(object):
+    """
+    Stand in for any maya or Qt class, function or enum
+    """
+    __metaclass__ = StubType
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return StubClass()
+
+class StubModule(types.ModuleType):
+    """
+    Stand in module whose attributes are stand in classes
+    """
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        stub = StubType(name, (StubClass,), {})
+        setattr(self, name, stub)
+        return stub
+
+if __name__ == '__main__':
+    main()
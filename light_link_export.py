@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Exporters that write the light links of a light link object to other
+    formats for rendering. Lights are read and written one at a time, so
+    only one light's assets are held in memory by the export. The shards
+    of a sharded file are read without being kept loaded
+
+    Writers are registered by name:
+    collection - text with a [light] header followed by its assets
+    csv - light,asset rows
+    mel - mel script creating an object set per light
+
+    New formats are added with register_writer
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import csv
+import os
+import re
+import threading
+import traceback
+from Queue import Queue
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+# Number of threads writing per light files
+DEFAULT_WORKERS = 4
+
+# Number of assets added to a set per mel command
+MEL_CHUNK_SIZE = 100
+
+# Characters not allowed in exported file and set names
+EXPORT_NAME_REGEX = re.compile(r'[^A-Za-z0-9\_]')
+
+WRITERS = {}
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def get_export_name(light):
+    """
+    Returns a file and node safe name for a light
+    """
+    return EXPORT_NAME_REGEX.sub('_', light)
+
+def register_writer(name, writer_class):
+    """
+    Registers a writer class for an export format
+    """
+    WRITERS[name] = writer_class
+
+def get_writer(name):
+    """
+    Returns a new writer for an export format
+    """
+    if not name in WRITERS:
+        raise ValueError('Unknown light link export format: {0}'
+                         .format(name))
+    return WRITERS[name]()
+
+def iter_link_assets(link_obj, lights = None):
+    """
+    Yields each light with its list of assets, one light at a time
+    """
+    if lights is None:
+        lights = sorted(link_obj.get_links())
+    for light in lights:
+        # A link without an assets list exports as empty
+        yield light, link_obj.read_link_assets(light) or []
+
+def export_links(link_obj, export_path, writer_name, lights = None):
+    """
+    Exports the light links to a single file
+    """
+    writer = get_writer(writer_name)
+    with open(export_path, 'wb') as export_file:
+        writer.write_header(export_file)
+        for light, assets in iter_link_assets(link_obj, lights):
+            writer.write_light(export_file, light, assets)
+        writer.write_footer(export_file)
+    return export_path
+
+def export_light(export_path, writer_name, light, assets):
+    """
+    Exports a single light link to its own file
+    """
+    writer = get_writer(writer_name)
+    with open(export_path, 'wb') as export_file:
+        writer.write_header(export_file)
+        writer.write_light(export_file, light, assets)
+        writer.write_footer(export_file)
+
+def export_links_per_light(link_obj, export_dir, writer_name,
+                           lights = None, workers = DEFAULT_WORKERS):
+    """
+    Exports each light link to its own file in the export directory,
+    writing the files on several threads. Returns the exported files
+    """
+    extension = get_writer(writer_name).extension
+    if not os.path.isdir(export_dir):
+        os.makedirs(export_dir)
+
+    # The link object is only read here, a bounded queue hands the lights
+    # to the writer threads so only a few are held in memory at once
+    light_queue = Queue(maxsize = workers * 2)
+    export_paths = []
+    export_names = set()
+    errors = []
+
+    def write_lights():
+        # Any error is recorded rather than ending the thread, a thread
+        # that stops taking lights would block the queue forever
+        while True:
+            item = light_queue.get()
+            if item is None:
+                return
+            export_path, light, assets = item
+            try:
+                export_light(export_path, writer_name, light, assets)
+            except Exception as error:
+                traceback.print_exc()
+                errors.append(error)
+
+    threads = [threading.Thread(target = write_lights)
+               for i in range(max(1, workers))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    try:
+        for light, assets in iter_link_assets(link_obj, lights):
+            # Different light names can end up with the same file name
+            export_name = get_export_name(light)
+            count = 1
+            while export_name in export_names:
+                export_name = '{0}_{1}'.format(get_export_name(light), count)
+                count += 1
+            export_names.add(export_name)
+
+            export_path = os.path.join(export_dir, export_name + extension)
+            export_paths.append(export_path)
+            light_queue.put((export_path, light, assets))
+    finally:
+        for thread in threads:
+            light_queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise IOError('Could not export {0} light links to {1}'
+                      .format(len(errors), export_dir))
+    return export_paths
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ CLASSES --#
+
+class LightLinkWriter(object):
+    """
+    Base class for light link export formats. Subclasses yield the lines
+    of each light, or override write_light to write them directly
+    """
+    extension = '.txt'
+
+    def iter_header_lines(self):
+        """
+        Yields the lines written before the lights
+        """
+        return iter(())
+
+    def iter_light_lines(self, light, assets):
+        """
+        Yields the lines of a light link
+        """
+        return iter(())
+
+    def iter_footer_lines(self):
+        """
+        Yields the lines written after the lights
+        """
+        return iter(())
+
+    def write_header(self, export_file):
+        """
+        Writes the lines before the lights
+        """
+        export_file.writelines(self.iter_header_lines())
+
+    def write_light(self, export_file, light, assets):
+        """
+        Writes the lines of a light link
+        """
+        export_file.writelines(self.iter_light_lines(light, assets))
+
+    def write_footer(self, export_file):
+        """
+        Writes the lines after the lights
+        """
+        export_file.writelines(self.iter_footer_lines())
+
+class CollectionWriter(LightLinkWriter):
+    """
+    Writes each light as a [light] header followed by an asset per line
+    """
+    extension = '.txt'
+
+    def iter_light_lines(self, light, assets):
+        """
+        Yields the header and asset lines of a light link
+        """
+        yield '[{0}]\n'.format(light)
+        for asset in assets:
+            yield '{0}\n'.format(asset)
+        yield '\n'
+
+class CsvWriter(LightLinkWriter):
+    """
+    Writes a light,asset row for each asset linked to a light
+    """
+    extension = '.csv'
+
+    def write_header(self, export_file):
+        """
+        Writes the column names
+        """
+        csv.writer(export_file).writerow(['light', 'asset'])
+
+    def write_light(self, export_file, light, assets):
+        """
+        Writes the rows of a light link
+        """
+        csv.writer(export_file).writerows((light, asset)
+                                          for asset in assets)
+
+class MelSetWriter(LightLinkWriter):
+    """
+    Writes a mel script creating an object set of the assets of each light
+    """
+    extension = '.mel'
+
+    def iter_light_lines(self, light, assets):
+        """
+        Yields the mel commands creating a light's object set
+        """
+        set_name = get_export_name(light) + '_lightLink'
+        yield '// {0}\n'.format(light)
+        yield 'sets -empty -name "{0}";\n'.format(set_name)
+        for i in range(0, len(assets), MEL_CHUNK_SIZE):
+            asset_names = ' '.join('"{0}"'.format(asset) for asset
+                                   in assets[i:i + MEL_CHUNK_SIZE])
+            yield 'sets -addElement "{0}" {1};\n'.format(set_name,
+                                                        asset_names)
+        yield '\n'
+
+register_writer('collection', CollectionWriter)
+register_writer('csv', CsvWriter)
+register_writer('mel', MelSetWriter)
@@ -30,9 +30,6 @@ import traceback
 import maya.OpenMaya as omaya
 import maya.OpenMayaMPx as omayampx
 
-# custom
-import light_link_bject as llo
-
 #-----------------------------------------------------------------------------#
 #------------------------------------------------------------------ GLOBALS --#
 
@@ -81,16 +78,20 @@ class LightLinkNode(omayampx.MPxNode):
         """
         omayampx.MPxNode.__init__(self)
 
-        lightLinkObj = llo.LightLinkJsonObject(lightlink_json)
+        # Imported on first node creation, registering the plugin
+        # doesn't need it
+        import light_link_object as llo
+
+        self.lightLinkObj = llo.LightLinkJsonObject(lightlink_json)
 
     def compute(self, plug, data):
         """
         Compute function of the node
         """
         lightName = data.inputValue(LightLinkNode.inLightAttr).asString()
-        lightLinkAssets = LightLinkNode.lightLinkObj.get_assets()
-        lightLinked = LightLinkNode.lightLinkObj
-                                   .get_links(lightName)
+        lightLinkAssets = self.lightLinkObj.get_assets()
+        # Cached by the link object until its light links change
+        lightLinked = self.lightLinkObj.get_asset_links(lightName)
         assetArrayHandle = data.outputArrayValue(LightLinkNode.outAssetsAttr)
         assetArrayBuilder = omaya.MArrayDataBuilder(
                                                 LightLinkNode.outAssetsAttr,
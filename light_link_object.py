@@ -29,55 +29,254 @@
       }
     }
 
+    Large shows can be split into a manifest holding the assets and a
+    light to shard file index, with one shard file per light:
+    {
+      "assets": ["car", "tree", "girl", "house"],
+      "shards": {
+        "key": "show_shards/key.json",
+        "fill": "show_shards/fill.json"
+      }
+    }
+    The shards are read when a light is first used and only changed shards
+    are written on save, see light_link_shards
+
+    Light link files can be gzip, bz2 or lzma compressed, the compression
+    is detected from the file's first bytes and kept when saving
+
+    Derived queries are cached by the data version, which every edit
+    increases and which clears the cache, so cached results are never out
+    of date. The cache is limited by the number of assets it holds
+
 """
 
 #-----------------------------------------------------------------------------#
 #------------------------------------------------------------------ IMPORTS --#
 
 # Built-in
+import bz2
+import gzip
+import os
 import traceback
+from collections import OrderedDict
 try:
   import simplejson as json
 except ImportError:
   import json
+try:
+  import lzma
+except ImportError:
+  try:
+    from backports import lzma
+  except ImportError:
+    lzma = None
 
 #-----------------------------------------------------------------------------#
 #------------------------------------------------------------------ GLOBALS --#
 
 ASSETS_TAG = 'assets'
 LIGHTLINK_TAG = 'lightlinks'
+SHARDS_TAG = 'shards'
+
+# Light link files with these extensions are SQLite databases
+SQLITE_EXTS = ('.db', '.sqlite', '.sqlite3')
+
+# Compression of light link json files
+NO_COMPRESSION = 'none'
+GZIP_COMPRESSION = 'gzip'
+BZ2_COMPRESSION = 'bz2'
+LZMA_COMPRESSION = 'lzma'
+
+# First bytes of each compressed file format
+COMPRESSION_MAGIC = [(GZIP_COMPRESSION, '\x1f\x8b'),
+                     (BZ2_COMPRESSION, 'BZh'),
+                     (LZMA_COMPRESSION, '\xfd7zXZ\x00')]
+MAGIC_SIZE = max(len(magic) for compression, magic in COMPRESSION_MAGIC)
+
+# Separators without the whitespace for compact json
+COMPACT_SEPARATORS = (',', ':')
+
+# Maximum number of assets held by the cached query results
+QUERY_CACHE_SIZE = 500000
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def open_light_links(path):
+    """
+    Returns the light link object for a light link json or database file
+    """
+    if os.path.splitext(path)[1].lower() in SQLITE_EXTS:
+        # Only database files need sqlite
+        import light_link_sqlite as llsqlite
+
+        return llsqlite.LightLinkSqliteObject(path)
+    return LightLinkJsonObject(path)
+
+def get_compression(json_path):
+    """
+    Returns the compression of a json file from its first bytes
+    """
+    with open(json_path, 'rb') as json_file:
+        header = json_file.read(MAGIC_SIZE)
+    for compression, magic in COMPRESSION_MAGIC:
+        if header.startswith(magic):
+            return compression
+    return NO_COMPRESSION
+
+def open_json_file(json_path, mode, compression = NO_COMPRESSION):
+    """
+    Returns a file object that compresses or decompresses the json as
+    it is written or read
+    """
+    if compression == GZIP_COMPRESSION:
+        return gzip.open(json_path, mode)
+    if compression == BZ2_COMPRESSION:
+        return bz2.BZ2File(json_path, mode)
+    if compression == LZMA_COMPRESSION:
+        if lzma is None:
+            raise ValueError('lzma is not available to read or write '
+                             '{0}'.format(json_path))
+        return lzma.LZMAFile(json_path, mode)
+    return open(json_path, mode)
+
+def read_json(json_path):
+    """
+    Reads and returns the data of a json file, compressed or not
+    """
+    compression = get_compression(json_path)
+    with open_json_file(json_path, 'rb', compression) as json_file:
+        return json.load(json_file)
+
+def write_json(json_path, data, compression = NO_COMPRESSION,
+               compact = False):
+    """
+    Writes data to a json file. The json is encoded and compressed in
+    chunks as it is written, compact json has no indents or spaces
+    """
+    if compact:
+        format_args = {'separators': COMPACT_SEPARATORS}
+    else:
+        format_args = {'indent': 4}
+
+    with open_json_file(json_path, 'wb', compression) as json_file:
+        json.dump(data, json_file, encoding = 'utf-8', **format_args)
 
 #-----------------------------------------------------------------------------#
 #------------------------------------------------------------------ CLASSES --#
 
+class QueryCache (object):
+    """
+    Class holding query results up to a total size, dropping the least
+    recently used results first. The size of a result is its length
+    """
+    def __init__(self, max_size = QUERY_CACHE_SIZE):
+        """
+        Initialize an empty cache
+        """
+        self.max_size = max_size
+        self.results = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, query):
+        """
+        Returns the cached result for a key, running the query if missing
+        """
+        if key in self.results:
+            self.hits += 1
+            # Move the result to the most recently used end
+            result = self.results.pop(key)
+            self.results[key] = result
+            return result
+
+        self.misses += 1
+        result = query()
+        result_size = len(result) + 1
+        if result_size > self.max_size:
+            return result
+
+        self.results[key] = result
+        self.size += result_size
+        while self.size > self.max_size:
+            old_key, old_result = self.results.popitem(last = False)
+            self.size -= len(old_result) + 1
+        return result
+
+    def clear_results(self):
+        """
+        Removes all cached results, keeping the statistics
+        """
+        self.results.clear()
+        self.size = 0
+
+    def clear(self):
+        """
+        Removes all cached results and statistics
+        """
+        self.clear_results()
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self):
+        """
+        Returns a dict of the cache hits, misses, hit rate and size
+        """
+        queries = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / queries if queries else 0.0,
+                'results': len(self.results),
+                'size': self.size,
+                'max_size': self.max_size}
+
 class LightLinkJsonObject (object):
     """
     Class for reading and writing light linker json
     """
-    def __init__(self, json_path):
+    def __init__(self, json_path, compression = None, compact = False,
+                 cache_size = QUERY_CACHE_SIZE):
         """
-        Initialize the light linker json file
+        Initialize the light linker json file. The file is saved with the
+        given compression, or the compression it was read with
         """
         self.json_path = json_path
         self.model_links = None
         self.model_assets = None
-        self.link_dict = None
+        self.sharded = False
+        self.assets_changed = False
+        self.compression = compression
+        self.compact = compact
+        self.data_version = 0
+        self.query_cache = QueryCache(cache_size)
 
         try:
-            with open(self.json_path, 'r') as json_file:
-                self.model_json = json.load(json_file)
+            if self.compression is None:
+                self.compression = get_compression(self.json_path)
+            self.model_json = read_json(self.json_path)
         except IOError:
             traceback.print_exc()
-            print 'JSON file not found: {0}'
+            print 'JSON file not found: {0}'\
                   .format(self.json_path)
         except ValueError:
             traceback.print_exc()
-            print 'JSON decoding failed for file: {0}'
+            print 'JSON decoding failed for file: {0}'\
                   .format(self.json_path)
         else:
-            self.model_links = self.model_json.get(LIGHTLINK_TAG)
+            if SHARDS_TAG in self.model_json:
+                # Only sharded files need the shard handling
+                import light_link_shards as llshards
+
+                self.sharded = True
+                self.model_links = llshards.ShardedLinks(
+                                        os.path.dirname(self.json_path),
+                                        self.model_json[SHARDS_TAG],
+                                        compression = self.compression,
+                                        compact = self.compact)
+            else:
+                self.model_links = self.model_json.get(LIGHTLINK_TAG)
             self.model_assets = self.model_json.get(ASSETS_TAG)
-            self.setup_default_link()
 
     def get_links(self):
         """
@@ -93,82 +292,161 @@ class LightLinkJsonObject (object):
 
     def get_link_assets(self, light):
         """
-        Returns a list of assets for a light
+        Returns a copy of the list of assets for a light, edits go through
+        the edit functions so cached queries are dropped
         """
         link_assets = []
         lights = self.get_links()
         if light in lights:
             link_assets = lights[light].get(ASSETS_TAG)
-        return link_assets
+        if link_assets is None:
+            return None
+        return list(link_assets)
 
-    def get_asset_links(self, light):
+    def get_link_asset_list(self, light):
+        """
+        Returns the stored list of assets for a light, for the edit
+        functions, adding an empty list to a link without one
+        """
+        return self.get_links()[light].setdefault(ASSETS_TAG, [])
+
+    def read_link_assets(self, light):
+        """
+        Returns a list of assets for a light, reading a light of a sharded
+        file without keeping its shard loaded. The list shouldn't be
+        modified
+        """
+        if self.sharded and light in self.model_links:
+            return self.model_links.read_link(light).get(ASSETS_TAG)
+        if light in self.get_links():
+            return self.get_links()[light].get(ASSETS_TAG)
+        return []
+
+    def get_cached(self, query_name, args, query):
+        """
+        Returns the cached result of a query for the current data version
+        """
+        return self.query_cache.get((self.data_version, query_name, args),
+                                    query)
+
+    def get_cache_stats(self):
+        """
+        Returns a dict of the query cache hits, misses, hit rate and size
+        """
+        return self.query_cache.get_stats()
+
+    def get_link_asset_set(self, light):
+        """
+        Returns a frozenset of assets for a light
+        """
+        return self.get_cached('link_asset_set', light,
+                               lambda: frozenset(self.get_link_assets(light)
+                                                 or ()))
+
+    def get_union_link_assets(self, lights):
+        """
+        Returns a frozenset of assets linked to any of the given lights
         """
-        Returns a dict of all assets with their links to a light
+        # Generators can only be iterated once, the frozen lights are used
+        # for both the key and the query
+        lights = frozenset(lights)
+
+        def query():
+            union_assets = set()
+            for light in lights:
+                union_assets.update(self.get_link_asset_set(light))
+            return frozenset(union_assets)
+        return self.get_cached('union_link_assets', lights, query)
+
+    def get_common_link_assets(self, lights):
+        """
+        Returns a frozenset of assets linked to all of the given lights
         """
-        self.setup_default_link()
+        lights = frozenset(lights)
 
-        # Gather all asset names
-        link_assets = self.get_link_assets(light)
+        def query():
+            if not lights:
+                return frozenset()
+            light_sets = sorted((self.get_link_asset_set(light)
+                                 for light in lights), key=len)
+            return light_sets[0].intersection(*light_sets[1:])
+        return self.get_cached('common_link_assets', lights, query)
 
-        for asset in link_assets:
-            self.set_asset_visibility(asset, True)
-        return self.link_dict
+    def get_asset_links(self, light):
+        """
+        Returns a dict of all assets with their links to a light. The dict
+        is cached and shouldn't be modified
+        """
+        def query():
+            link_assets = self.get_link_asset_set(light)
+            return {x: x in link_assets for x in self.model_assets}
+        return self.get_cached('asset_links', light, query)
 
-    def setup_default_link(self):
+    def set_data_changed(self):
         """
-        Sets up a default visibility dict
+        Increases the data version and drops the cached queries, which
+        can't be used again
         """
-        # Creating a dict for populating visibilities later
-        self.link_dict = {x: False for x in self.model_assets}
+        self.data_version += 1
+        self.query_cache.clear_results()
 
-    def set_asset_link(self, asset, linked):
+    def set_link_changed(self, light):
         """
-        Sets light linking for asset
+        Marks the assets of a light link as changed so they are saved
         """
-        self.link_dict[asset] = linked
+        self.set_data_changed()
+        if self.sharded:
+            self.model_links.set_changed(light)
 
     def add_link(self,light_name):
         """
         Adds a new empty light link
         """
         self.model_links[str(light_name)] = {ASSETS_TAG: []}
+        self.set_data_changed()
 
     def add_assets(self, assets):
         """
         Adds list of assets to the json
         """
-        assets.sort()
-        if not asset in assets:
-            self.model_assets.append(asset)
-        self.setup_default_link()
+        existing_assets = set(self.model_assets)
+        for asset in sorted(set(assets)):
+            if not asset in existing_assets:
+                self.model_assets.append(asset)
+                self.assets_changed = True
+        self.set_data_changed()
 
     def add_assets_to_link(self, light, assets):
         """
         Adds a list of assets to a light link
         """
-        link_assets = self.get_link_assets(light)
+        link_assets = self.get_link_asset_list(light)
         link_assets.extend(assets)
+        self.set_link_changed(light)
 
     def rename_link(self, old_light, new_light):
         """
         Function that renames a light link
         """
         self.model_links[new_light] = self.model_links.pop(old_light)
+        self.set_data_changed()
 
     def remove_assets_from_link(self, light, assets):
         """
         Removes a list of assets from a light link
         """
-        link_assets = self.get_link_assets(light)
+        link_assets = self.get_link_asset_list(light)
 
         for asset in assets:
             link_assets.remove(asset)
+        self.set_link_changed(light)
 
     def delete_link(self, light_name):
         """
         Function to delete the selected light
         """
         self.get_links().pop(light_name)
+        self.set_data_changed()
 
     def delete_links(self, light_names):
         """
@@ -181,16 +459,27 @@ class LightLinkJsonObject (object):
         """
         Function to delete the selected asset
         """
-        self.get_assets().pop(asset_name)
-        for light in self.get_links():
-            self.remove_assets_from_light(light, [asset_name])
+        self.delete_assets([asset_name])
 
     def delete_assets(self, asset_names):
         """
-        Function to delete the selected assets
+        Function to delete the selected assets, and their links, in a
+        single pass over the assets and light links
         """
-        for asset_name in asset_names:
-            self.delete_asset(asset_name)
+        deleted_assets = set(asset_names)
+        if not deleted_assets:
+            return
+        self.model_assets[:] = [asset for asset in self.model_assets
+                                if not asset in deleted_assets]
+        self.assets_changed = True
+        self.set_data_changed()
+
+        for light, link in self.get_links().iteritems():
+            link_assets = link.get(ASSETS_TAG)
+            if link_assets and not deleted_assets.isdisjoint(link_assets):
+                link_assets[:] = [asset for asset in link_assets
+                                  if not asset in deleted_assets]
+                self.set_link_changed(light)
 
     def has_assets(self):
         """
@@ -202,23 +491,45 @@ class LightLinkJsonObject (object):
         """
         Function that checks if the  asset exists in the light link
         """
-        link_assets = self.get_link_assets(light)
-        return True if asset in link_assets else False
+        return asset in self.get_link_asset_set(light)
 
     def save_to_json(self):
         """
         Saves the modified json to file
         """
+        if self.sharded:
+            self.save_shards()
+            return
+
         self.model_json[LIGHTLINK_TAG] = self.model_links
         self.model_json[ASSETS_TAG] = self.model_assets
 
         try:
-            with open(self.json_path, 'w') as json_file:
-                json.dump(self.model_json, json_file,
-                          indent = 4, encoding = 'utf-8')
-        except TypeError, ValueError:
+            write_json(self.json_path, self.model_json,
+                       self.compression, self.compact)
+        except (TypeError, ValueError):
             traceback.print_exc()
-            print 'Could not serialize JSON: {0}'
+            print 'Could not serialize JSON: {0}'\
                   .format(self.model_json)
         else:
             print 'Saved changes to model light links'
+
+    def save_shards(self):
+        """
+        Saves the changed shards, and the manifest if the lights or
+        assets changed
+        """
+        try:
+            manifest_changed = self.model_links.save()
+            if manifest_changed or self.assets_changed:
+                self.model_json[SHARDS_TAG] = self.model_links.get_shards()
+                self.model_json[ASSETS_TAG] = self.model_assets
+                write_json(self.json_path, self.model_json,
+                           self.compression, self.compact)
+        except (TypeError, ValueError):
+            traceback.print_exc()
+            print 'Could not serialize JSON shards for: {0}'\
+                  .format(self.json_path)
+        else:
+            self.assets_changed = False
+            print 'Saved changes to model light link shards'
@@ -0,0 +1,368 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Background loading of the light link files of neighbouring shots
+    Shots are expected to be folders next to each other holding light link
+    files of the same name:
+    seq010/
+      sh0100/lightlinks.json
+      sh0110/lightlinks.json
+      sh0120/lightlinks.json
+    When sh0110 is opened, sh0120 and sh0100 are found and loaded on
+    background threads, so switching to them doesn't have to wait for the
+    file. Light link files sitting next to each other in a single folder
+    are treated as neighbouring shots too
+
+    Loaded shots are kept within a memory budget, estimated from their
+    uncompressed file sizes. A load that hasn't started can be cancelled,
+    a running load is finished and its result dropped. A loaded shot whose
+    file has changed on disk since it was read is loaded again instead of
+    being used
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import os
+import struct
+import threading
+import traceback
+from collections import OrderedDict
+from Queue import Queue
+
+# custom
+import light_link_object as llo
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+# Number of shots on each side of the current shot to load
+DEFAULT_RADIUS = 1
+
+DEFAULT_WORKERS = 2
+
+# Estimated memory budget of the loaded shots in bytes
+DEFAULT_MEMORY_BUDGET = 512 * 1024 * 1024
+
+# Estimated memory used per byte of uncompressed light link json
+MEMORY_PER_FILE_BYTE = 10
+
+# Estimated uncompressed bytes per byte of compressed file, gzip files
+# store their uncompressed size so they don't need an estimate
+COMPRESSION_RATIOS = {llo.BZ2_COMPRESSION: 20,
+                      llo.LZMA_COMPRESSION: 20}
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def get_neighbor_shots(path, radius = DEFAULT_RADIUS):
+    """
+    Returns the light link files of the shots around a shot, nearest first
+    """
+    path = os.path.abspath(path)
+    shot_dir, file_name = os.path.split(path)
+    seq_dir, shot_name = os.path.split(shot_dir)
+
+    # Shot folders holding a light link file of the same name
+    try:
+        shots = sorted(name for name in os.listdir(seq_dir)
+                       if os.path.isfile(os.path.join(seq_dir, name,
+                                                      file_name)))
+        shot_paths = [os.path.join(seq_dir, name, file_name)
+                      for name in shots]
+    except OSError:
+        shot_paths = []
+
+    # Otherwise light link files next to each other in the shot folder
+    if len(shot_paths) < 2:
+        extension = os.path.splitext(file_name)[1]
+        try:
+            shot_paths = [os.path.join(shot_dir, name) for name
+                          in sorted(os.listdir(shot_dir))
+                          if os.path.splitext(name)[1] == extension]
+        except OSError:
+            return []
+
+    if not path in shot_paths:
+        return []
+
+    index = shot_paths.index(path)
+    neighbors = []
+    for offset in range(1, radius + 1):
+        for neighbor_index in (index + offset, index - offset):
+            if 0 <= neighbor_index < len(shot_paths):
+                neighbors.append(shot_paths[neighbor_index])
+    return neighbors
+
+def get_file_stamp(path):
+    """
+    Returns the modified time and size of a file, or None if it's missing
+    """
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    return file_stat.st_mtime, file_stat.st_size
+
+def get_uncompressed_size(path):
+    """
+    Returns the size of a light link file once decompressed, estimated
+    for compressions that don't store it
+    """
+    size = os.path.getsize(path)
+    compression = llo.get_compression(path)
+    if compression == llo.GZIP_COMPRESSION and size >= 4:
+        # The last 4 bytes are the uncompressed size, modulo 4GB
+        with open(path, 'rb') as gzip_file:
+            gzip_file.seek(-4, os.SEEK_END)
+            return max(struct.unpack('<I', gzip_file.read(4))[0], size)
+    return size * COMPRESSION_RATIOS.get(compression, 1)
+
+def get_memory_cost(path):
+    """
+    Returns the estimated memory needed by a loaded light link file
+    """
+    try:
+        return get_uncompressed_size(path) * MEMORY_PER_FILE_BYTE
+    except (IOError, OSError):
+        return 0
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ CLASSES --#
+
+class PrefetchJob(object):
+    """
+    Class holding the state of a single background load
+    """
+    def __init__(self, path):
+        """
+        Initialize a pending load of a light link file
+        """
+        self.path = os.path.abspath(path)
+        self.cost = get_memory_cost(self.path)
+        self.file_stamp = None
+        self.link_obj = None
+        self.cancelled = False
+        self.done = threading.Event()
+
+class NeighborScan(object):
+    """
+    Class holding a request to prefetch the neighbours of a shot
+    """
+    def __init__(self, path):
+        """
+        Initialize a pending scan of the shots around a light link file
+        """
+        self.path = os.path.abspath(path)
+
+class ShotPrefetcher(object):
+    """
+    Class that loads the light links of neighbouring shots on background
+    threads and hands them out when a shot is opened
+    """
+    def __init__(self, memory_budget = DEFAULT_MEMORY_BUDGET,
+                 radius = DEFAULT_RADIUS, workers = DEFAULT_WORKERS,
+                 get_neighbors = get_neighbor_shots,
+                 open_links = llo.open_light_links):
+        """
+        Initialize the prefetcher and start its loader threads
+        """
+        self.memory_budget = memory_budget
+        self.radius = radius
+        self.get_neighbors = get_neighbors
+        self.open_links = open_links
+
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+        self.job_queue = Queue()
+        self.current_path = None
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.cancelled = 0
+        self.evicted = 0
+
+        self.threads = [threading.Thread(target = self.run_jobs)
+                        for i in range(max(1, workers))]
+        for thread in self.threads:
+            thread.daemon = True
+            thread.start()
+
+    def run_jobs(self):
+        """
+        Loads queued light link files and scans for neighbouring shots
+        until shut down
+        """
+        while True:
+            job = self.job_queue.get()
+            if job is None:
+                return
+            if isinstance(job, NeighborScan):
+                self.scan_neighbors(job.path)
+                continue
+            if not job.cancelled:
+                try:
+                    # Taken before reading so a change while reading shows
+                    job.file_stamp = get_file_stamp(job.path)
+                    job.link_obj = self.open_links(job.path)
+                except Exception:
+                    traceback.print_exc()
+            job.done.set()
+
+    def prefetch(self, paths):
+        """
+        Queues background loads of light link files
+        """
+        with self.lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                if path in self.jobs:
+                    continue
+                job = PrefetchJob(path)
+                self.jobs[path] = job
+                self.job_queue.put(job)
+            self.fit_budget(set(os.path.abspath(path) for path in paths))
+
+    def update(self, path):
+        """
+        Sets the current shot, its neighbours are found and prefetched on
+        the loader threads
+        """
+        with self.lock:
+            self.current_path = os.path.abspath(path)
+        self.job_queue.put(NeighborScan(path))
+
+    def scan_neighbors(self, path):
+        """
+        Prefetches the neighbours of a shot and cancels pending loads of
+        shots that are no longer neighbours
+        """
+        # A newer shot was opened while the scan was queued
+        if path != self.current_path:
+            return
+
+        try:
+            neighbors = self.get_neighbors(path, self.radius)
+        except Exception:
+            traceback.print_exc()
+            return
+        keep_paths = set(os.path.abspath(neighbor) for neighbor in neighbors)
+        with self.lock:
+            for job_path, job in self.jobs.items():
+                if not job_path in keep_paths and not job.done.is_set():
+                    self.cancel_job(job)
+        self.prefetch(neighbors)
+
+    def load(self, path):
+        """
+        Returns the light link object of a file, from a finished or running
+        prefetch if there is one, otherwise loading it now
+        """
+        path = os.path.abspath(path)
+        with self.lock:
+            job = self.jobs.pop(path, None)
+            if job is not None and job.cancelled:
+                job = None
+
+        # The dialog edits the returned object, so it leaves the cache
+        if job is not None:
+            job.done.wait()
+            if job.link_obj is not None:
+                # Saving an object read before the file changed would
+                # overwrite the change
+                if job.file_stamp != get_file_stamp(path):
+                    self.stale += 1
+                else:
+                    self.hits += 1
+                    return job.link_obj
+
+        self.misses += 1
+        return self.open_links(path)
+
+    def cancel(self, path):
+        """
+        Cancels the prefetch of a light link file
+        """
+        with self.lock:
+            job = self.jobs.get(os.path.abspath(path))
+            if job is not None:
+                self.cancel_job(job)
+
+    def cancel_all(self):
+        """
+        Cancels all prefetches
+        """
+        with self.lock:
+            for job in self.jobs.values():
+                self.cancel_job(job)
+
+    def cancel_job(self, job):
+        """
+        Cancels a prefetch, the lock must be held
+        """
+        job.cancelled = True
+        job.link_obj = None
+        self.jobs.pop(job.path, None)
+        self.cancelled += 1
+
+    def fit_budget(self, keep_paths):
+        """
+        Drops prefetches until the estimate fits the memory budget, the
+        lock must be held. Shots outside keep_paths go first, oldest first,
+        then the kept shots furthest from the current shot
+        """
+        jobs = list(self.jobs.values())
+        drop_jobs = [job for job in jobs if not job.path in keep_paths]
+        drop_jobs.extend(reversed([job for job in jobs
+                                   if job.path in keep_paths]))
+
+        memory = sum(job.cost for job in jobs)
+        for job in drop_jobs:
+            if memory <= self.memory_budget:
+                return
+            memory -= job.cost
+            if job.done.is_set():
+                self.jobs.pop(job.path)
+                job.link_obj = None
+                self.evicted += 1
+            else:
+                self.cancel_job(job)
+
+    def get_memory(self):
+        """
+        Returns the estimated memory of the prefetched shots
+        """
+        with self.lock:
+            return sum(job.cost for job in self.jobs.itervalues())
+
+    def get_stats(self):
+        """
+        Returns a dict of the prefetch hits, misses and hit rate. Stale
+        prefetches are counted as misses too
+        """
+        loads = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / loads if loads else 0.0,
+                'stale': self.stale,
+                'cancelled': self.cancelled,
+                'evicted': self.evicted,
+                'memory': self.get_memory(),
+                'memory_budget': self.memory_budget}
+
+    def shutdown(self):
+        """
+        Cancels the prefetches and stops the loader threads
+        """
+        self.cancel_all()
+        for thread in self.threads:
+            self.job_queue.put(None)
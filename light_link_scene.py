@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Functions for applying light links from a light link object to the
+    Maya scene
+    Only the difference between the json and the scene is applied, as a
+    dict of lights with the assets to link and unlink:
+    {
+      "key": {
+        "make": ["car"],
+        "break": ["tree"]
+      }
+    }
+    Each light's assets are linked and unlinked in large batched lightlink
+    calls inside a single undo chunk. The cmds module can be passed in,
+    otherwise maya.cmds is used
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+MAKE_TAG = 'make'
+BREAK_TAG = 'break'
+
+# Maximum number of objects passed to a single cmds call
+CHUNK_SIZE = 1000
+
+UNDO_CHUNK_NAME = 'applyLightLinks'
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def get_cmds(cmds = None):
+    """
+    Returns the given cmds module or maya.cmds, imported on first use
+    """
+    if cmds is None:
+        from maya import cmds
+    return cmds
+
+def iter_chunks(items, chunk_size = CHUNK_SIZE):
+    """
+    Yields successive chunks of a list
+    """
+    for i in range(0, len(items), chunk_size):
+        yield items[i:i + chunk_size]
+
+def get_scene_objects(names, cmds = None, chunk_size = CHUNK_SIZE):
+    """
+    Returns the set of the given object names that exist in the scene
+    """
+    cmds = get_cmds(cmds)
+    scene_objects = set()
+    for chunk in iter_chunks(list(names), chunk_size):
+        scene_objects.update(cmds.ls(chunk) or [])
+    return scene_objects
+
+def compute_link_delta(link_obj, cmds = None, chunk_size = CHUNK_SIZE):
+    """
+    Returns a dict of the assets to link to and unlink from each light so
+    the scene matches the light link object. Lights and assets missing
+    from the scene are skipped and objects outside the asset list are
+    left alone
+    """
+    cmds = get_cmds(cmds)
+
+    scene_lights = get_scene_objects(link_obj.get_links(), cmds, chunk_size)
+    scene_assets = get_scene_objects(link_obj.get_assets(), cmds, chunk_size)
+
+    link_delta = {}
+    for light in sorted(scene_lights):
+        # A link without an assets list has nothing linked
+        linked = set(link_obj.get_link_assets(light) or []) & scene_assets
+        scene_linked = set(cmds.lightlink(query=True, light=light) or [])
+        scene_linked &= scene_assets
+
+        make_assets = sorted(linked - scene_linked)
+        break_assets = sorted(scene_linked - linked)
+        if make_assets or break_assets:
+            link_delta[light] = {MAKE_TAG: make_assets,
+                                 BREAK_TAG: break_assets}
+    return link_delta
+
+def apply_link_delta(link_delta, cmds = None, chunk_size = CHUNK_SIZE):
+    """
+    Links and unlinks the assets of each light in a link delta within a
+    single undo chunk
+    """
+    cmds = get_cmds(cmds)
+
+    cmds.undoInfo(openChunk=True, chunkName=UNDO_CHUNK_NAME)
+    try:
+        for light in sorted(link_delta):
+            light_delta = link_delta[light]
+            for chunk in iter_chunks(light_delta[MAKE_TAG], chunk_size):
+                cmds.lightlink(make=True, light=light, object=chunk)
+            for chunk in iter_chunks(light_delta[BREAK_TAG], chunk_size):
+                # 'break' is a python keyword so it can't be passed directly
+                cmds.lightlink(light=light, object=chunk,
+                               **{BREAK_TAG: True})
+    finally:
+        cmds.undoInfo(closeChunk=True)
+
+def apply_links_to_scene(link_obj, cmds = None, chunk_size = CHUNK_SIZE):
+    """
+    Applies the light links of a light link object to the scene and
+    returns the applied link delta
+    """
+    cmds = get_cmds(cmds)
+
+    link_delta = compute_link_delta(link_obj, cmds, chunk_size)
+    if link_delta:
+        apply_link_delta(link_delta, cmds, chunk_size)
+    return link_delta
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Search index for filtering light link assets by name
+    Each asset gets an id in asset order. Every lower case 1, 2 and 3
+    letter piece of an asset name maps to the ids of the assets containing
+    it, in id order:
+    {
+      "c": [0, 5],
+      "ca": [0, 5],
+      "car": [0, 5],
+      "ide": [5],
+      ...
+    }
+    Short searches are a single lookup, longer ones only check the assets
+    of their rarest 3 letter piece. Results are ids in asset order, so
+    filtered rows never need sorting
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import bisect
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+# Longest indexed n-gram, longer search text is checked against the names
+NGRAM_SIZE = 3
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def get_ngrams(text, sizes = range(1, NGRAM_SIZE + 1)):
+    """
+    Returns the set of n-grams of the given sizes of a lower case text
+    """
+    ngrams = set()
+    for size in sizes:
+        ngrams.update([text[i:i + size]
+                       for i in range(len(text) - size + 1)])
+    return ngrams
+
+def remove_sorted(items, item):
+    """
+    Removes an item from a sorted list
+    """
+    i = bisect.bisect_left(items, item)
+    if i < len(items) and items[i] == item:
+        del items[i]
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ CLASSES --#
+
+class AssetSearchIndex(object):
+    """
+    Class holding an n-gram index of asset names that is updated as
+    assets are added and removed. Assets must be added in asset order
+    """
+    def __init__(self, assets = None):
+        """
+        Initialize the index with a list of assets
+        """
+        self.asset_ids = {}
+        self.asset_names = {}
+        self.lower_names = {}
+        self.ordered_ids = []
+        self.ngram_ids = {}
+        self.next_id = 0
+
+        if assets:
+            self.add_assets(assets)
+
+    def __len__(self):
+        """
+        Returns the number of indexed assets
+        """
+        return len(self.asset_ids)
+
+    def __contains__(self, asset):
+        """
+        Checks if an asset is indexed
+        """
+        return asset in self.asset_ids
+
+    def add_assets(self, assets):
+        """
+        Adds a list of assets to the end of the index
+        """
+        # Locals keep the loop quick when indexing a whole show
+        asset_ids = self.asset_ids
+        ngram_ids = self.ngram_ids
+        for asset in assets:
+            if asset in asset_ids:
+                continue
+            asset_id = self.next_id
+            self.next_id += 1
+
+            lower_name = asset.lower()
+            asset_ids[asset] = asset_id
+            self.asset_names[asset_id] = asset
+            self.lower_names[asset_id] = lower_name
+            self.ordered_ids.append(asset_id)
+            for ngram in get_ngrams(lower_name):
+                try:
+                    ngram_ids[ngram].append(asset_id)
+                except KeyError:
+                    ngram_ids[ngram] = [asset_id]
+
+    def remove_assets(self, assets):
+        """
+        Removes a list of assets from the index
+        """
+        for asset in assets:
+            asset_id = self.asset_ids.pop(asset, None)
+            if asset_id is None:
+                continue
+            del self.asset_names[asset_id]
+            lower_name = self.lower_names.pop(asset_id)
+            remove_sorted(self.ordered_ids, asset_id)
+            for ngram in get_ngrams(lower_name):
+                ngram_ids = self.ngram_ids[ngram]
+                remove_sorted(ngram_ids, asset_id)
+                if not ngram_ids:
+                    del self.ngram_ids[ngram]
+
+    def get_ids(self, assets):
+        """
+        Returns the ids of the indexed assets in asset order
+        """
+        return sorted(self.asset_ids[asset] for asset in assets
+                      if asset in self.asset_ids)
+
+    def search(self, text):
+        """
+        Returns the ids, in asset order, of the assets whose name contains
+        the text, ignoring case
+        """
+        text = text.lower()
+        if not text:
+            return list(self.ordered_ids)
+
+        if len(text) <= NGRAM_SIZE:
+            return list(self.ngram_ids.get(text, ()))
+
+        # Only the assets of the rarest n-gram can match
+        candidates = None
+        for ngram in get_ngrams(text, (NGRAM_SIZE,)):
+            ngram_ids = self.ngram_ids.get(ngram)
+            if not ngram_ids:
+                return []
+            if candidates is None or len(ngram_ids) < len(candidates):
+                candidates = ngram_ids
+        lower_names = self.lower_names
+        return [asset_id for asset_id in candidates
+                if text in lower_names[asset_id]]
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Handler classes for sharded light link json files
+    A sharded light link file is a manifest holding the assets and an index
+    of light names to shard files, relative to the manifest:
+    {
+      "assets": ["car", "tree", "girl", "house"],
+      "shards": {
+        "key": "show_shards/key.json",
+        "fill": "show_shards/fill.json"
+      }
+    }
+    Shard paths always use forward slashes, so the manifest reads the same
+    on every platform. Each shard file holds the assets of a single light:
+    {
+      "light": "key",
+      "assets": ["car", "girl"]
+    }
+    Converters to and from the single file light link json are included
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import os
+import posixpath
+import re
+from collections import MutableMapping
+
+# custom
+import light_link_object as llo
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+LIGHT_TAG = 'light'
+
+SHARD_DIR_SUFFIX = '_shards'
+SHARD_EXT = '.json'
+
+# Characters not allowed in shard file names
+SHARD_NAME_REGEX = re.compile(r'[^A-Za-z0-9\-\_]')
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def get_shard_dir(manifest_path):
+    """
+    Returns the shard directory of a manifest, relative to the manifest
+    """
+    manifest_name = os.path.splitext(os.path.basename(manifest_path))[0]
+    return manifest_name + SHARD_DIR_SUFFIX
+
+def split_json(json_path, manifest_path):
+    """
+    Converts a single file light link json into a manifest and shards
+    """
+    model_json = llo.read_json(json_path)
+
+    shard_links = ShardedLinks(os.path.dirname(manifest_path), {},
+                               get_shard_dir(manifest_path))
+    for light, link in model_json.get(llo.LIGHTLINK_TAG, {}).iteritems():
+        shard_links[light] = link
+    shard_links.save()
+
+    manifest = {llo.ASSETS_TAG: model_json.get(llo.ASSETS_TAG, []),
+                llo.SHARDS_TAG: shard_links.get_shards()}
+    llo.write_json(manifest_path, manifest)
+
+def join_shards(manifest_path, json_path):
+    """
+    Converts a manifest and its shards into a single file light link json
+    """
+    manifest = llo.read_json(manifest_path)
+
+    shard_links = ShardedLinks(os.path.dirname(manifest_path),
+                               manifest.get(llo.SHARDS_TAG, {}))
+    model_json = {llo.ASSETS_TAG: manifest.get(llo.ASSETS_TAG, []),
+                  llo.LIGHTLINK_TAG: dict(shard_links.iteritems())}
+    llo.write_json(json_path, model_json)
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ CLASSES --#
+
+class ShardedLinks(MutableMapping):
+    """
+    Dict of light links that reads each light's shard on first use and
+    keeps track of the shards that need writing
+    """
+    def __init__(self, manifest_dir, shards, shard_dir = None,
+                 compression = llo.NO_COMPRESSION, compact = False):
+        """
+        Initialize the links from the manifest's light to shard index
+        """
+        self.manifest_dir = manifest_dir
+        # Older manifests written on Windows can hold backslashes
+        self.shards = dict((light, shard.replace('\\', '/'))
+                           for light, shard in shards.iteritems())
+        self.used_shards = set(self.shards.itervalues())
+        self.shard_dir = shard_dir
+        self.compression = compression
+        self.compact = compact
+
+        self.loaded_links = {}
+        self.changed_lights = set()
+        self.deleted_shards = set()
+        self.manifest_changed = False
+
+        if self.shard_dir is None:
+            self.shard_dir = self.get_default_shard_dir()
+
+    def __getitem__(self, light):
+        """
+        Returns the link of a light, reading its shard if needed
+        """
+        if not light in self.loaded_links:
+            self.loaded_links[light] = self.read_shard(light)
+        return self.loaded_links[light]
+
+    def __setitem__(self, light, link):
+        """
+        Sets the link of a light, adding a shard for new lights
+        """
+        if not light in self.shards:
+            shard = self.get_new_shard(light)
+            self.shards[light] = shard
+            self.used_shards.add(shard)
+            self.manifest_changed = True
+        self.loaded_links[light] = link
+        self.changed_lights.add(light)
+
+    def __delitem__(self, light):
+        """
+        Removes a light and its shard
+        """
+        shard = self.shards.pop(light)
+        self.used_shards.discard(shard)
+        self.deleted_shards.add(shard)
+        self.loaded_links.pop(light, None)
+        self.changed_lights.discard(light)
+        self.manifest_changed = True
+
+    def __contains__(self, light):
+        """
+        Checks if a light exists without reading its shard
+        """
+        return light in self.shards
+
+    def __iter__(self):
+        """
+        Iterates over the light names
+        """
+        return iter(self.shards)
+
+    def __len__(self):
+        """
+        Returns the number of lights
+        """
+        return len(self.shards)
+
+    def read_shard(self, light):
+        """
+        Reads and returns the link of a light from its shard
+        """
+        shard_data = llo.read_json(self.get_shard_path(light))
+        return {llo.ASSETS_TAG: shard_data[llo.ASSETS_TAG]}
+
+    def read_link(self, light):
+        """
+        Returns the link of a light without keeping it loaded, so reading
+        every light doesn't hold the whole show in memory
+        """
+        if light in self.loaded_links:
+            return self.loaded_links[light]
+        return self.read_shard(light)
+
+    def get_shards(self):
+        """
+        Returns the light to shard file index
+        """
+        return dict(self.shards)
+
+    def get_shard_path(self, light):
+        """
+        Returns the full path of a light's shard
+        """
+        return os.path.join(self.manifest_dir, self.shards[light])
+
+    def get_default_shard_dir(self):
+        """
+        Returns the directory of the existing shards, or a default one
+        """
+        for shard in self.shards.itervalues():
+            return posixpath.dirname(shard)
+        return 'lightlink' + SHARD_DIR_SUFFIX
+
+    def get_new_shard(self, light):
+        """
+        Returns an unused shard file for a light
+        """
+        shard_name = SHARD_NAME_REGEX.sub('_', light)
+        shard = posixpath.join(self.shard_dir, shard_name + SHARD_EXT)
+        count = 1
+        while shard in self.used_shards:
+            shard = posixpath.join(self.shard_dir,
+                                   '{0}_{1}{2}'.format(shard_name, count,
+                                                       SHARD_EXT))
+            count += 1
+        return shard
+
+    def set_changed(self, light):
+        """
+        Marks a light's shard as needing to be written
+        """
+        if light in self.shards:
+            self.changed_lights.add(light)
+
+    def save(self):
+        """
+        Writes the changed shards and removes the deleted ones, returns
+        True if the manifest needs writing
+        """
+        # Deleted shards go first as a new light can reuse the file name
+        for shard in self.deleted_shards:
+            shard_path = os.path.join(self.manifest_dir, shard)
+            if os.path.exists(shard_path):
+                os.remove(shard_path)
+        self.deleted_shards = set()
+
+        for light in self.changed_lights:
+            shard_path = self.get_shard_path(light)
+            shard_dir = os.path.dirname(shard_path)
+            if not os.path.isdir(shard_dir):
+                os.makedirs(shard_dir)
+            llo.write_json(shard_path,
+                           {LIGHT_TAG: light,
+                            llo.ASSETS_TAG: self.loaded_links[light]
+                                                     [llo.ASSETS_TAG]},
+                           self.compression, self.compact)
+        self.changed_lights = set()
+
+        manifest_changed = self.manifest_changed
+        self.manifest_changed = False
+        return manifest_changed
@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Handler classes for reading and writing light links in a SQLite database
+    The database has the same light links as the light link json:
+    assets - id, name
+    lights - id, name
+    links - light_id, asset_id, one row per asset linked to a light
+
+    The database uses write-ahead logging, so the tool can write while the
+    farm reads the last saved light links. Each edit is committed on its
+    own, so no write lock is held between edits. Converters to and from
+    the light link json are included
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import sqlite3
+import traceback
+
+# custom
+import light_link_object as llo
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS lights (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS links (
+    light_id INTEGER NOT NULL REFERENCES lights (id) ON DELETE CASCADE,
+    asset_id INTEGER NOT NULL REFERENCES assets (id) ON DELETE CASCADE,
+    PRIMARY KEY (light_id, asset_id)
+);
+CREATE INDEX IF NOT EXISTS links_asset_light ON links (asset_id, light_id);
+"""
+
+SELECT_LINK_ASSETS = """
+SELECT assets.name FROM links
+JOIN assets ON assets.id = links.asset_id
+WHERE links.light_id = (SELECT id FROM lights WHERE name = ?)
+ORDER BY assets.id
+"""
+
+INSERT_LINK_ASSET = """
+INSERT OR IGNORE INTO links (light_id, asset_id)
+SELECT lights.id, assets.id FROM lights, assets
+WHERE lights.name = ? AND assets.name = ?
+"""
+
+DELETE_LINK_ASSET = """
+DELETE FROM links
+WHERE light_id = (SELECT id FROM lights WHERE name = ?)
+AND asset_id = (SELECT id FROM assets WHERE name = ?)
+"""
+
+HAS_LINK_ASSET = """
+SELECT 1 FROM links
+WHERE light_id = (SELECT id FROM lights WHERE name = ?)
+AND asset_id = (SELECT id FROM assets WHERE name = ?)
+"""
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def json_to_sqlite(json_path, db_path):
+    """
+    Converts a light link json into a light link database
+    """
+    link_obj = LightLinkSqliteObject(db_path)
+    link_obj.import_json(json_path)
+    link_obj.close()
+
+def sqlite_to_json(db_path, json_path):
+    """
+    Converts a light link database into a single file light link json
+    """
+    link_obj = LightLinkSqliteObject(db_path)
+    link_obj.export_json(json_path)
+    link_obj.close()
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ CLASSES --#
+
+class LightLinkSqliteObject (object):
+    """
+    Class for reading and writing light links in a SQLite database, with the
+    same interface as the light link json object
+    """
+    def __init__(self, db_path):
+        """
+        Initialize the light link database
+        """
+        self.db_path = db_path
+        self.connection = None
+        self.model_assets = None
+        self.link_dict = None
+
+        try:
+            # The dialog opens the database in a loader thread
+            self.connection = sqlite3.connect(self.db_path,
+                                              check_same_thread = False)
+            self.connection.execute('PRAGMA journal_mode = WAL')
+            self.connection.execute('PRAGMA synchronous = NORMAL')
+            self.connection.execute('PRAGMA foreign_keys = ON')
+            self.connection.executescript(SCHEMA)
+        except sqlite3.Error:
+            traceback.print_exc()
+            print 'Could not open light link database: {0}'\
+                  .format(self.db_path)
+            self.connection = None
+        else:
+            self.model_assets = self.query_names(
+                                 'SELECT name FROM assets ORDER BY id')
+            self.setup_default_link()
+
+    def query_names(self, query, params = ()):
+        """
+        Returns the first column of a query as a list
+        """
+        return [row[0] for row in self.connection.execute(query, params)]
+
+    def get_links(self):
+        """
+        Returns a list of available light links in the database
+        """
+        if self.connection is None:
+            return None
+        return self.query_names('SELECT name FROM lights ORDER BY name')
+
+    def get_assets(self):
+        """
+        Returns a list of available assets in the database
+        """
+        return self.model_assets
+
+    def get_link_assets(self, light):
+        """
+        Returns a list of assets for a light
+        """
+        return self.query_names(SELECT_LINK_ASSETS, (light,))
+
+    def read_link_assets(self, light):
+        """
+        Returns a list of assets for a light, nothing is kept in memory
+        """
+        return self.get_link_assets(light)
+
+    def get_union_link_assets(self, lights):
+        """
+        Returns a set of assets linked to any of the given lights
+        """
+        union_assets = set()
+        for light in lights:
+            union_assets.update(self.get_link_assets(light))
+        return union_assets
+
+    def get_common_link_assets(self, lights):
+        """
+        Returns a set of assets linked to all of the given lights
+        """
+        lights = list(lights)
+        if not lights:
+            return set()
+        common_assets = set(self.get_link_assets(lights[0]))
+        for light in lights[1:]:
+            common_assets.intersection_update(self.get_link_assets(light))
+        return common_assets
+
+    def get_asset_links(self, light):
+        """
+        Returns a dict of all assets with their links to a light
+        """
+        self.setup_default_link()
+
+        for asset in self.get_link_assets(light):
+            self.set_asset_link(asset, True)
+        return self.link_dict
+
+    def setup_default_link(self):
+        """
+        Sets up a default visibility dict
+        """
+        self.link_dict = {x: False for x in self.model_assets}
+
+    def set_asset_link(self, asset, linked):
+        """
+        Sets light linking for asset
+        """
+        self.link_dict[asset] = linked
+
+    def add_link(self, light_name):
+        """
+        Adds a new empty light link
+        """
+        light_name = str(light_name)
+        with self.connection:
+            self.connection.execute('DELETE FROM lights WHERE name = ?',
+                                    (light_name,))
+            self.connection.execute('INSERT INTO lights (name) VALUES (?)',
+                                    (light_name,))
+
+    def add_assets(self, assets):
+        """
+        Adds list of assets to the database
+        """
+        existing_assets = set(self.model_assets)
+        new_assets = [asset for asset in sorted(set(assets))
+                      if not asset in existing_assets]
+        with self.connection:
+            self.connection.executemany(
+                                'INSERT INTO assets (name) VALUES (?)',
+                                [(asset,) for asset in new_assets])
+        self.model_assets.extend(new_assets)
+        self.setup_default_link()
+
+    def add_assets_to_link(self, light, assets):
+        """
+        Adds a list of assets to a light link
+        """
+        with self.connection:
+            self.connection.executemany(INSERT_LINK_ASSET,
+                                        [(light, asset) for asset in assets])
+
+    def rename_link(self, old_light, new_light):
+        """
+        Function that renames a light link, replacing any link that already
+        has the new name
+        """
+        if new_light == old_light:
+            return
+        with self.connection:
+            self.connection.execute('DELETE FROM lights WHERE name = ?',
+                                    (new_light,))
+            self.connection.execute(
+                                'UPDATE lights SET name = ? WHERE name = ?',
+                                (new_light, old_light))
+
+    def remove_assets_from_link(self, light, assets):
+        """
+        Removes a list of assets from a light link
+        """
+        with self.connection:
+            self.connection.executemany(DELETE_LINK_ASSET,
+                                        [(light, asset) for asset in assets])
+
+    def delete_link(self, light_name):
+        """
+        Function to delete the selected light
+        """
+        self.delete_links([light_name])
+
+    def delete_links(self, light_names):
+        """
+        Function to delete the selected lights
+        """
+        with self.connection:
+            self.connection.executemany(
+                                'DELETE FROM lights WHERE name = ?',
+                                [(light,) for light in light_names])
+
+    def delete_asset(self, asset_name):
+        """
+        Function to delete the selected asset
+        """
+        self.delete_assets([asset_name])
+
+    def delete_assets(self, asset_names):
+        """
+        Function to delete the selected assets
+        """
+        with self.connection:
+            self.connection.executemany(
+                                'DELETE FROM assets WHERE name = ?',
+                                [(asset,) for asset in asset_names])
+        deleted_assets = set(asset_names)
+        self.model_assets[:] = [asset for asset in self.model_assets
+                                if not asset in deleted_assets]
+        self.setup_default_link()
+
+    def has_assets(self):
+        """
+        Function that checks if there are any assets available
+        """
+        return bool(self.get_assets())
+
+    def has_link_asset(self, light, asset):
+        """
+        Function that checks if the  asset exists in the light link
+        """
+        cursor = self.connection.execute(HAS_LINK_ASSET, (light, asset))
+        return cursor.fetchone() is not None
+
+    def save_to_json(self):
+        """
+        Commits the modified light links to the database
+        """
+        try:
+            self.connection.commit()
+        except sqlite3.Error:
+            traceback.print_exc()
+            print 'Could not save light link database: {0}'\
+                  .format(self.db_path)
+        else:
+            print 'Saved changes to model light links'
+
+    def import_json(self, json_path):
+        """
+        Replaces the light links in the database with a light link json
+        """
+        json_obj = llo.LightLinkJsonObject(json_path)
+        links = json_obj.get_links()
+        if links is None:
+            return
+
+        with self.connection:
+            self.connection.execute('DELETE FROM lights')
+            self.connection.execute('DELETE FROM assets')
+            self.connection.executemany(
+                                'INSERT INTO assets (name) VALUES (?)',
+                                [(asset,) for asset in json_obj.get_assets()])
+            self.model_assets[:] = json_obj.get_assets()
+            self.setup_default_link()
+            self.connection.executemany(
+                                'INSERT INTO lights (name) VALUES (?)',
+                                [(light,) for light in links])
+            for light in links:
+                self.connection.executemany(
+                                INSERT_LINK_ASSET,
+                                [(light, asset) for asset
+                                 in json_obj.get_link_assets(light)])
+
+    def export_json(self, json_path):
+        """
+        Writes the light links in the database to a light link json
+        """
+        model_links = {}
+        for light in self.get_links():
+            model_links[light] = {llo.ASSETS_TAG:
+                                  self.get_link_assets(light)}
+        llo.write_json(json_path, {llo.ASSETS_TAG: self.get_assets(),
+                                   llo.LIGHTLINK_TAG: model_links})
+
+    def close(self):
+        """
+        Commits and closes the database connection
+        """
+        if self.connection is None:
+            return
+        self.connection.commit()
+        self.connection.close()
+        self.connection = None
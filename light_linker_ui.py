@@ -14,15 +14,17 @@
 #-----------------------------------------------------------------------------#
 #------------------------------------------------------------------ IMPORTS --#
 
+# Built-in
+import bisect
+import traceback
+
 # third-party
 from PyQt4.QtCore import *
 from PyQt4 import QtGui
 
-# internal
-from maya import cmds
-
 # custom
-import light_link_object as llo
+import light_link_scene as llscene
+import light_link_search as lls
 
 #-----------------------------------------------------------------------------#
 #------------------------------------------------------------------ GLOBALS --#
@@ -35,6 +37,18 @@ MULTISELECT_MODE = QtGui.QAbstractItemView.MultiSelection
 
 LINK_LABEL = "Light Link"
 ASSET_LABEL = "Asset"
+LOADING_LABEL = "Loading light links..."
+LOAD_FAILED_LABEL = "Could not load light links from {0}"
+
+# Asset filter modes, in the order shown in the filter combo box
+FILTER_ALL = 0
+FILTER_LINKED = 1
+FILTER_UNLINKED = 2
+FILTER_LABELS = ["All Assets", "Linked Only", "Unlinked Only"]
+
+# Internal pointers that tell the asset model which level an index is on
+_ROOT_LEVEL = object()
+_ASSET_LEVEL = object()
 
 #-----------------------------------------------------------------------------#
 #---------------------------------------------------------------- FUNCTIONS --#
@@ -54,45 +68,512 @@ def validate_text(self, button):
 
 def get_selected_list(list_box):
     """
-    This function returns the selected items text as a list
+    This function returns the selected rows names as a list
     """
     text_list = []
-    for item in list_box.selectedItems():
-        text_list.append(str(item.text()))
+    model = list_box.model()
+    for index in list_box.selectionModel().selectedRows():
+        name = model.name(index)
+        if name is not None:
+            text_list.append(name)
     return text_list
 
 #-----------------------------------------------------------------------------#
 #------------------------------------------------------------------ CLASSES --#
 
+class LightLinkListModel(QAbstractListModel):
+    """
+    List model of the light links in a light link object. No per-row items
+    are created, rows are the sorted light names of the link object
+    """
+    def __init__(self, link_obj, parent = None):
+        """
+        Initialization of the light link list model
+        """
+        super(LightLinkListModel, self).__init__(parent)
+
+        self.link_obj = link_obj
+        self.link_names = sorted(self.link_obj.get_links())
+
+    def rowCount(self, parent = QModelIndex()):
+        """
+        Returns the number of light links
+        """
+        if parent.isValid():
+            return 0
+        return len(self.link_names)
+
+    def data(self, index, role = Qt.DisplayRole):
+        """
+        Returns the light name for a row
+        """
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.link_names[index.row()]
+        return None
+
+    def name(self, index):
+        """
+        Returns the light name of an index
+        """
+        if not index.isValid():
+            return None
+        return self.link_names[index.row()]
+
+    def link_index(self, light):
+        """
+        Returns the model index of a light, invalid if it doesn't exist
+        """
+        row = bisect.bisect_left(self.link_names, light)
+        if row < len(self.link_names) and self.link_names[row] == light:
+            return self.index(row, 0)
+        return QModelIndex()
+
+    def reset_links(self):
+        """
+        Re-reads the light links from the link object
+        """
+        self.beginResetModel()
+        self.link_names = sorted(self.link_obj.get_links())
+        self.endResetModel()
+
+    def add_link(self, light):
+        """
+        Adds a new light link and inserts its row
+        """
+        row = bisect.bisect_left(self.link_names, light)
+        if row < len(self.link_names) and self.link_names[row] == light:
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.link_obj.add_link(light)
+        self.link_names.insert(row, light)
+        self.endInsertRows()
+
+    def rename_link(self, old_light, new_light):
+        """
+        Renames a light link and moves its row
+        """
+        if old_light == new_light or new_light in self.link_obj.get_links():
+            return
+        self._remove_row(old_light)
+        self.link_obj.rename_link(old_light, new_light)
+        row = bisect.bisect_left(self.link_names, new_light)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.link_names.insert(row, new_light)
+        self.endInsertRows()
+
+    def delete_links(self, lights):
+        """
+        Deletes light links and removes their rows
+        """
+        for light in lights:
+            self._remove_row(light)
+        self.link_obj.delete_links(lights)
+
+    def _remove_row(self, light):
+        """
+        Removes the row of a light from the model
+        """
+        row = self.link_index(light).row()
+        if row < 0:
+            return
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.link_names[row]
+        self.endRemoveRows()
+
+class LightLinkAssetModel(QAbstractItemModel):
+    """
+    Tree model of the assets in a light link object. A single top level
+    row holds the assets, which are read straight from the link object
+    unless a filter is set
+    """
+    def __init__(self, link_obj, parent = None, search_index = None):
+        """
+        Initialization of the light link asset model. The search index is
+        built here if the loader didn't build it
+        """
+        super(LightLinkAssetModel, self).__init__(parent)
+
+        self.link_obj = link_obj
+
+        # Asset name to position in the link object, the asset rows when
+        # no filter is set
+        self.asset_order = {}
+        # Search index ids of the filtered assets in link object order,
+        # None if not filtered
+        self.visible_ids = None
+        # Asset check states shown when several light links are selected
+        self.link_states = None
+
+        if search_index is None:
+            search_index = lls.AssetSearchIndex(self.link_obj.get_assets())
+        self.search_index = search_index
+
+        self.build_asset_order()
+
+    def index(self, row, column, parent = QModelIndex()):
+        """
+        Returns the model index for a row under the parent
+        """
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, _ROOT_LEVEL)
+        return self.createIndex(row, column, _ASSET_LEVEL)
+
+    def parent(self, index):
+        """
+        Returns the parent index of an index
+        """
+        if not index.isValid() or index.internalPointer() is _ROOT_LEVEL:
+            return QModelIndex()
+        return self.createIndex(0, 0, _ROOT_LEVEL)
+
+    def rowCount(self, parent = QModelIndex()):
+        """
+        Returns the number of rows under the parent
+        """
+        if not parent.isValid():
+            return 1
+        if parent.column() > 0:
+            return 0
+        if parent.internalPointer() is _ROOT_LEVEL:
+            return self.get_asset_count()
+        return 0
+
+    def columnCount(self, parent = QModelIndex()):
+        """
+        Returns the number of columns
+        """
+        return 1
+
+    def data(self, index, role = Qt.DisplayRole):
+        """
+        Returns the asset name for a row
+        """
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self.name(index) or ASSET_LABEL
+        if role == Qt.CheckStateRole and self.link_states is not None:
+            name = self.name(index)
+            if name is not None:
+                return self.link_states.get(name, Qt.Unchecked)
+        return None
+
+    def flags(self, index):
+        """
+        Only the asset rows are selectable
+        """
+        if not index.isValid():
+            return Qt.NoItemFlags
+        if index.internalPointer() is _ROOT_LEVEL:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsSelectable | Qt.ItemIsEnabled
+
+    def name(self, index):
+        """
+        Returns the asset name of an index, None for the top level row
+        """
+        if not index.isValid() or index.internalPointer() is _ROOT_LEVEL:
+            return None
+        if self.visible_ids is not None:
+            return self.search_index.asset_names[
+                                        self.visible_ids[index.row()]]
+        return self.link_obj.get_assets()[index.row()]
+
+    def get_asset_count(self):
+        """
+        Returns the number of asset rows
+        """
+        if self.visible_ids is not None:
+            return len(self.visible_ids)
+        return len(self.link_obj.get_assets())
+
+    def get_asset_row(self, asset):
+        """
+        Returns the row of an asset, None if it isn't shown
+        """
+        if self.visible_ids is None:
+            return self.asset_order.get(asset)
+
+        # The filtered ids are in row order so the row can be bisected
+        asset_id = self.search_index.asset_ids.get(asset)
+        if asset_id is None:
+            return None
+        row = bisect.bisect_left(self.visible_ids, asset_id)
+        if row < len(self.visible_ids) and \
+           self.visible_ids[row] == asset_id:
+            return row
+        return None
+
+    def root_index(self):
+        """
+        Returns the index of the top level row
+        """
+        return self.index(0, 0)
+
+    def asset_index(self, asset):
+        """
+        Returns the model index of an asset, invalid if it doesn't exist
+        """
+        row = self.get_asset_row(asset)
+        if row is None:
+            return QModelIndex()
+        return self.index(row, 0, self.root_index())
+
+    def asset_selection(self, assets):
+        """
+        Returns a selection of the given assets, with neighbouring rows
+        merged into ranges
+        """
+        selection = QtGui.QItemSelection()
+        rows = sorted(row for row in (self.get_asset_row(asset)
+                                      for asset in assets)
+                      if row is not None)
+        if not rows:
+            return selection
+
+        root = self.root_index()
+        first = last = rows[0]
+        for row in rows[1:]:
+            if row != last + 1:
+                selection.select(self.index(first, 0, root),
+                                 self.index(last, 0, root))
+                first = row
+            last = row
+        selection.select(self.index(first, 0, root),
+                         self.index(last, 0, root))
+        return selection
+
+    def build_asset_order(self):
+        """
+        Rebuilds the asset name to link object position lookup
+        """
+        self.asset_order = dict((asset, row) for row, asset
+                                in enumerate(self.link_obj.get_assets()))
+
+    def set_filter(self, asset_ids):
+        """
+        Shows only the assets with the given search index ids, which must
+        be in asset order, or all assets if None
+        """
+        self.beginResetModel()
+        self.visible_ids = asset_ids
+        self.endResetModel()
+
+    def set_link_states(self, common_assets, any_assets):
+        """
+        Shows assets linked to all selected lights as checked and assets
+        linked to only some of them as partially checked
+        """
+        self.link_states = dict.fromkeys(any_assets, Qt.PartiallyChecked)
+        self.link_states.update(dict.fromkeys(common_assets, Qt.Checked))
+        self.emit_assets_changed()
+
+    def clear_link_states(self):
+        """
+        Hides the asset check states
+        """
+        if self.link_states is None:
+            return
+        self.link_states = None
+        self.emit_assets_changed()
+
+    def emit_assets_changed(self):
+        """
+        Tells the views that all asset rows have changed
+        """
+        count = self.get_asset_count()
+        if not count:
+            return
+        root = self.root_index()
+        self.dataChanged.emit(self.index(0, 0, root),
+                              self.index(count - 1, 0, root))
+
+    def reset_assets(self):
+        """
+        Re-reads the assets from the link object. The search index is kept
+        up to date by the model edits and isn't rebuilt
+        """
+        self.beginResetModel()
+        self.link_states = None
+        self.build_asset_order()
+        self.endResetModel()
+
+    def add_assets(self, assets):
+        """
+        Adds assets to the link object and inserts their rows
+        """
+        # The link object appends new assets sorted, the index follows it
+        new_assets = sorted(set(asset for asset in assets
+                                if not asset in self.asset_order))
+        if not new_assets:
+            return
+        self.search_index.add_assets(new_assets)
+
+        # New assets stay hidden until the filter is set again
+        if self.visible_ids is not None:
+            self.link_obj.add_assets(new_assets)
+            self.build_asset_order()
+            return
+
+        first = len(self.link_obj.get_assets())
+        last = first + len(new_assets) - 1
+        self.beginInsertRows(self.root_index(), first, last)
+        self.link_obj.add_assets(new_assets)
+        assets = self.link_obj.get_assets()
+        for row in range(first, last + 1):
+            self.asset_order[assets[row]] = row
+        self.endInsertRows()
+
+    def delete_assets(self, assets):
+        """
+        Deletes assets from the link object in one batch. Rows next to
+        each other are removed as a single range, scattered rows reset
+        the model once
+        """
+        assets = [asset for asset in set(assets) if asset in self.asset_order]
+        if not assets:
+            return
+
+        rows = sorted(row for row in (self.get_asset_row(asset)
+                                      for asset in assets)
+                      if row is not None)
+        if not rows:
+            # Filtered out assets have no row but still need deleting
+            self.remove_assets(assets)
+        elif rows[-1] - rows[0] + 1 == len(rows):
+            self.beginRemoveRows(self.root_index(), rows[0], rows[-1])
+            self.remove_assets(assets)
+            self.endRemoveRows()
+        else:
+            self.beginResetModel()
+            self.remove_assets(assets)
+            self.endResetModel()
+
+    def remove_assets(self, assets):
+        """
+        Removes assets from the link object, the search index and the
+        filtered rows, without telling the views
+        """
+        if self.visible_ids is not None:
+            deleted_ids = set(self.search_index.get_ids(assets))
+            self.visible_ids = [asset_id for asset_id in self.visible_ids
+                                if not asset_id in deleted_ids]
+        self.link_obj.delete_assets(assets)
+        self.search_index.remove_assets(assets)
+        self.build_asset_order()
+
+class LightLinkLoader(QThread):
+    """
+    Thread that reads a light link json file off the main thread, taking
+    it from the prefetcher when one is given, and builds its asset search
+    index
+    """
+    loaded = pyqtSignal(object, object)
+
+    # Started loaders are kept here until they finish, so closing the
+    # dialog that started one can't destroy a running thread
+    running_loaders = set()
+
+    def __init__(self, model_json, prefetcher = None, parent = None):
+        """
+        Initialization of the light link loader
+        """
+        super(LightLinkLoader, self).__init__(parent)
+
+        self.model_json = model_json
+        self.prefetcher = prefetcher
+        self.finished.connect(self.release)
+
+    def start_loading(self):
+        """
+        Starts the thread, keeping the loader until it has finished
+        """
+        LightLinkLoader.running_loaders.add(self)
+        self.start()
+
+    def release(self):
+        """
+        Drops the loader once its thread has finished
+        """
+        self.wait()
+        LightLinkLoader.running_loaders.discard(self)
+
+    def run(self):
+        """
+        Reads the light link json and emits the loaded link object, or
+        None if it couldn't be loaded
+        """
+        link_obj = None
+        search_index = None
+        try:
+            if self.prefetcher is not None:
+                link_obj = self.prefetcher.load(self.model_json)
+            else:
+                # Imported on first use so opening the tool doesn't wait
+                import light_link_object as llo
+
+                link_obj = llo.open_light_links(self.model_json)
+
+            if link_obj.get_links() is not None:
+                search_index = lls.AssetSearchIndex(link_obj.get_assets())
+        except Exception:
+            # The dialog has to leave the loading state whatever happens
+            traceback.print_exc()
+            link_obj = None
+        self.loaded.emit(link_obj, search_index)
+
 class LightLinkerDialog(QtGui.QDialog):
     """
-    Main Light Linker Dialog that contains the tab widget and button box
+    Main Light Linker Dialog that contains the tab widget and button box.
+    The light links of the neighbouring shots are loaded in the background
+    so switching shots is quick
     """
-    def __init__(self, model_json, parent = None):
+    def __init__(self, model_json, parent = None, prefetcher = None):
         """
         Initialization of the Light Linker dialog
         """
         super(LightLinkerDialog, self).__init__(parent)
 
-        self.link_obj = llo.LightLinkJsonObject(model_json)
+        self.model_json = model_json
+        self.link_obj = None
+        self.tab_widget = None
+        self.loader = None
+        self.closed = False
+
+        # Without a prefetcher one is made once the first shot is loaded,
+        # only a prefetcher made here is shut down with the dialog
+        self.owns_prefetcher = prefetcher is None
+        self.prefetcher = prefetcher
 
         # Main light link layout
         link_layout = QtGui.QVBoxLayout()
 
         # Layout for light links list
-        link_tab_layout = QtGui.QHBoxLayout()
+        self.link_tab_layout = QtGui.QHBoxLayout()
         link_button_layout = QtGui.QHBoxLayout()
 
-        link_tab_layout.addWidget(LightLinkerTabWidget(self.link_obj,
-                                                       self))
+        # Shown until the light link json is loaded
+        self.loading_label = QtGui.QLabel(LOADING_LABEL)
+        self.loading_label.setAlignment(Qt.AlignCenter)
+        self.link_tab_layout.addWidget(self.loading_label)
 
-        link_layout.addLayout(link_tab_layout)
+        link_layout.addLayout(self.link_tab_layout)
 
-        # Close button
+        # Apply and close buttons
         button_box = QtGui.QDialogButtonBox()
         button_box.addButton(QtGui.QDialogButtonBox.Close)
         button_box.rejected.connect(self.close)
 
+        self.apply_btn = QtGui.QPushButton('Apply To Scene')
+        self.apply_btn.setEnabled(False)
+        self.apply_btn.clicked.connect(self.apply_to_scene)
+        button_box.addButton(self.apply_btn,
+                             QtGui.QDialogButtonBox.ApplyRole)
+
         link_button_layout.addWidget(button_box)
 
         link_layout.addLayout(link_button_layout)
@@ -105,24 +586,111 @@ class LightLinkerDialog(QtGui.QDialog):
         self.resize(600, 600)
         self.setWindowTitle('Create Light Links')
 
+        self.load_links(model_json)
+
+    def load_links(self, model_json):
+        """
+        Shows the loading state and loads a light link json in the
+        background
+        """
+        self.model_json = model_json
+        self.link_obj = None
+        self.apply_btn.setEnabled(False)
+        self.loading_label.setText(LOADING_LABEL)
+        self.loading_label.show()
+
+        # The loader has no parent so it can outlive the dialog
+        self.loader = LightLinkLoader(model_json, self.prefetcher)
+        self.loader.loaded.connect(self.show_links)
+        self.loader.start_loading()
+
+    def show_links(self, link_obj, search_index):
+        """
+        Replaces the loading state with the light link tabs
+        """
+        # Ignore loads of a shot that was switched away from, or that
+        # finished after the dialog was closed
+        if self.closed or self.sender() is not self.loader:
+            return
+
+        if link_obj is None or link_obj.get_links() is None:
+            self.loading_label.setText(
+                                LOAD_FAILED_LABEL.format(self.model_json))
+            return
+
+        self.link_obj = link_obj
+        self.apply_btn.setEnabled(True)
+        self.loading_label.hide()
+        self.tab_widget = LightLinkerTabWidget(self.link_obj, self,
+                                               search_index)
+        self.link_tab_layout.addWidget(self.tab_widget)
+
+        if self.prefetcher is None:
+            # The loader has already imported the light link reader
+            import light_link_prefetch as llprefetch
+
+            self.prefetcher = llprefetch.ShotPrefetcher()
+        self.prefetcher.update(self.model_json)
+
+    def switch_shot(self, model_json):
+        """
+        Saves the current light links and opens the light links of
+        another shot. A load still running is left to finish and ignored
+        """
+        self.save_links()
+
+        if self.tab_widget is not None:
+            self.link_tab_layout.removeWidget(self.tab_widget)
+            self.tab_widget.deleteLater()
+            self.tab_widget = None
+
+        self.load_links(model_json)
+
+    def save_links(self):
+        """
+        Saves the light links if they are loaded
+        """
+        if self.link_obj is not None:
+            self.link_obj.save_to_json()
+
+    def get_prefetch_stats(self):
+        """
+        Returns a dict of the shot prefetch hits, misses and hit rate, or
+        None before the first shot is loaded
+        """
+        if self.prefetcher is None:
+            return None
+        return self.prefetcher.get_stats()
+
+    def apply_to_scene(self):
+        """
+        Applies the light links to the Maya scene
+        """
+        link_delta = llscene.apply_links_to_scene(self.link_obj)
+        print 'Applied light links for {0} lights to the scene'\
+              .format(len(link_delta))
+
     def closeEvent(self, event):
         """
         Close event function
         """
-        self.link_obj.save_to_json()
+        self.closed = True
+        self.save_links()
+        if self.owns_prefetcher and self.prefetcher is not None:
+            self.prefetcher.shutdown()
 
 class LightLinkerTabWidget(QtGui.QTabWidget):
     """
     Light Linker tab widget that shows tabs for the creation
     of light links and add/remove assets
     """
-    def __init__(self, link_obj, parent = None):
+    def __init__(self, link_obj, parent = None, search_index = None):
         """
         Initialization of the Light Linker tabs
         """
         super(LightLinkerTabWidget, self).__init__(parent)
 
-        self.link_tab = LightLinkWidget(link_obj, self)
+        self.link_tab = LightLinkWidget(link_obj, self, search_index)
         #self.light_group_tab = LightGroupWidget(model, link_obj, self)
 
         self.addTab(self.link_tab, 'Light Links')
@@ -142,7 +710,7 @@ class LightLinkWidget(QtGui.QWidget):
     The Light Link widget allows the user to create light links
     and publish them
     """
-    def __init__(self, link_obj, parent = None):
+    def __init__(self, link_obj, parent = None, search_index = None):
         """
         Initialization of the light links dialog
         """
@@ -156,9 +724,14 @@ class LightLinkWidget(QtGui.QWidget):
         # Layout for links list
         link_list_layout = QtGui.QVBoxLayout()
 
-        self.link_box = QtGui.QListWidget()
+        self.link_model = LightLinkListModel(self.link_obj, self)
+        self.link_box = QtGui.QListView()
+        self.link_box.setModel(self.link_model)
         self.link_box.setMinimumHeight(450)
-        self.link_box.itemSelectionChanged.connect(self.select_link)
+        self.link_box.setUniformItemSizes(True)
+        self.link_box.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.link_box.selectionModel().selectionChanged.connect(
+                                                        self.select_link)
         self.link_box.doubleClicked.connect(self.rename_link_dialog)
         self.link_box.setSelectionMode(EXTENDSELECT_MODE)
         link_list_layout.addWidget(self.link_box)
@@ -186,9 +759,28 @@ class LightLinkWidget(QtGui.QWidget):
 
         asset_list_layout = QtGui.QVBoxLayout()
 
-        self.asset_box = QtGui.QTreeWidget()
+        # Asset filter text and mode
+        asset_filter_layout = QtGui.QHBoxLayout()
+
+        self.filter_box = QtGui.QLineEdit()
+        self.filter_box.setPlaceholderText('Filter Assets')
+        self.filter_box.textChanged.connect(self.filter_assets)
+        asset_filter_layout.addWidget(self.filter_box)
+
+        self.filter_mode = QtGui.QComboBox()
+        self.filter_mode.addItems(FILTER_LABELS)
+        self.filter_mode.currentIndexChanged.connect(self.filter_assets)
+        asset_filter_layout.addWidget(self.filter_mode)
+
+        asset_list_layout.addLayout(asset_filter_layout)
+
+        self.asset_model = LightLinkAssetModel(self.link_obj, self,
+                                               search_index)
+        self.asset_box = QtGui.QTreeView()
+        self.asset_box.setModel(self.asset_model)
         self.asset_box.setHeaderHidden(True)
-        self.asset_box.expandToDepth(1)
+        self.asset_box.setUniformRowHeights(True)
+        self.asset_box.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
         self.asset_box.setSelectionMode(MULTISELECT_MODE)
         self.asset_box.clicked.connect(self.toggle_clicked_item)
 
@@ -222,35 +814,69 @@ class LightLinkWidget(QtGui.QWidget):
         """
         Function to populate/refresh the assets
         """
-        self.asset_box.clear()
-
-        self.link_root = QtGui.QTreeWidgetItem(self.asset_box)
-        self.link_root.setText(0, ASSET_LABEL)
-        for asset in self.link_obj.get_assets():
-            item = QtGui.QTreeWidgetItem(self.link_root)
-            item.setText(0, asset)
-            item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
+        self.asset_model.reset_assets()
+        self.apply_asset_filter()
 
+    def apply_asset_filter(self):
+        """
+        Function that shows the assets matching the filter text and mode
+        """
+        text = str(self.filter_box.text()).strip()
+        mode = self.filter_mode.currentIndex()
+
+        search_index = self.asset_model.search_index
+        asset_ids = None
+        if text:
+            asset_ids = search_index.search(text)
+
+        # Search results and linked ids are in asset order, so filtering
+        # keeps the order without sorting
+        if mode != FILTER_ALL:
+            links = get_selected_list(self.link_box)
+            linked_assets = self.link_obj.get_union_link_assets(links)
+            if mode == FILTER_LINKED and asset_ids is None:
+                asset_ids = search_index.get_ids(linked_assets)
+            else:
+                linked_ids = set(search_index.get_ids(linked_assets))
+                if asset_ids is None:
+                    asset_ids = search_index.search('')
+                if mode == FILTER_LINKED:
+                    asset_ids = [asset_id for asset_id in asset_ids
+                                 if asset_id in linked_ids]
+                else:
+                    asset_ids = [asset_id for asset_id in asset_ids
+                                 if not asset_id in linked_ids]
+
+        self.asset_model.set_filter(asset_ids)
         self.asset_box.expandToDepth(1)
 
+    def filter_assets(self):
+        """
+        Function that filters the assets and restores the link selection
+        """
+        self.apply_asset_filter()
+        self.select_link()
+
     def select_link(self):
         """
         Function that selects the assets of the selected light link
         """
-        link = str(self.sender().currentItem().text())
+        links = get_selected_list(self.link_box)
 
-        self.clear_selections()
+        # Linked/unlinked filters depend on the selected light links
+        if self.sender() is self.link_box.selectionModel() and \
+           self.filter_mode.currentIndex() != FILTER_ALL:
+            self.apply_asset_filter()
 
-        if len(self.sender().selectedItems()) != 1:
-            return
-
-        assets = self.link_obj.get_link_assets(link)
+        # Select the assets linked to any of the selected light links
+        any_assets = self.link_obj.get_union_link_assets(links)
+        self.set_tree_selection(self.asset_box, any_assets)
 
-        # Select assets in the light link
-        if assets:
-            for asset in assets:
-                self.set_tree_item_state(self.asset_box,
-                                         asset, True)
+        if len(links) > 1:
+            common_assets = self.link_obj.get_common_link_assets(links)
+            self.asset_model.set_link_states(common_assets, any_assets)
+        else:
+            self.asset_model.clear_link_states()
 
     def create_link_dialog(self):
         """
@@ -297,7 +923,9 @@ class LightLinkWidget(QtGui.QWidget):
         """
         Function to rename an light link using a dialog
         """
-        old_link = str(self.sender().currentItem().text())
+        old_link = self.link_model.name(self.link_box.currentIndex())
+        if old_link is None:
+            return
 
         rename_link_dialog = QtGui.QDialog()
 
@@ -342,125 +970,101 @@ class LightLinkWidget(QtGui.QWidget):
         """
         Function that renames a light link object
         """
-        if not old_link is new_link:
-            self.link_obj.rename_link(old_link, new_link)
-        self.refresh_links()
+        if old_link != new_link:
+            self.link_model.rename_link(old_link, new_link)
         dialog.close()
 
     def add_link(self, dialog, name):
         """
         Function to add a new light link
         """
-        self.link_obj.add_link(name)
-        self.refresh_links()
+        self.link_model.add_link(str(name))
         dialog.close()
 
     def get_selected_link(self):
         """
         Function to return the current selected light link
         """
-        selection = self.link_box.selectedItems()
+        selection = get_selected_list(self.link_box)
         if selection:
-            return str(selection[0].text())
+            return selection[0]
         else:
             return None
 
-    def set_tree_item_state(self, tree_box,
-                            item_name, state,
-                            sub_items=None):
+    def set_tree_selection(self, tree_box, item_names):
         """
-        This function finds and selects/deselects a given item in a tree
+        This function replaces the selection of a tree with the given
+        items in a single batch
         """
-        items = tree_box.findItems(item_name,
-                                   Qt.MatchExactly|
-                                   Qt.MatchRecursive,
-                                   0)
-        if len(items) > 0:
-            selected_item = items[0]
-            selected_item.setSelected(state)
-            if state:
-                check_state = Qt.Checked
-            else:
-                check_state = Qt.Unchecked
-#             if not sub_items:
-#                 selected_item.setCheckState(0, check_state)
-#             else:
-            if sub_items:
-                child_count = selected_item.childCount()
-                for i in range(0, child_count):
-                    if selected_item.child(i).text(0) in sub_items:
-                        selected_item.child(i).setSelected(state)
-                        #selected_item.child(i).setCheckState(0, check_state)
-
-    def toggle_clicked_item(self):
+        selection = tree_box.model().asset_selection(item_names)
+        selection_model = tree_box.selectionModel()
+
+        # The per-row signals are not needed, the view is repainted once
+        selection_model.blockSignals(True)
+        try:
+            selection_model.select(selection,
+                                   QtGui.QItemSelectionModel.ClearAndSelect)
+        finally:
+            selection_model.blockSignals(False)
+        tree_box.viewport().update()
+
+    def toggle_clicked_item(self, index):
         """
         Function that adds/removes the asset to/from the link
         based on the item's selection state
         """
         tree_box = self.sender()
-        clicked_item = tree_box.currentItem()
-        if not clicked_item:
+        if not index.isValid():
             return
 
-        parent = clicked_item.parent()
-        if parent:
-            if clicked_item.isSelected():
-                state = True
-                #clicked_item.setCheckState(0, Qt.Checked)
-            else:
-                state = False
-                #clicked_item.setCheckState(0, Qt.Unchecked)
-            self.toggle_tree_item(tree_box, clicked_item, state)
+        if index.parent().isValid():
+            state = tree_box.selectionModel().isSelected(index)
+            self.toggle_tree_item(tree_box, index, state)
 
-    def toggle_tree_item(self, tree_box, item, state):
+    def toggle_tree_item(self, tree_box, index, state):
         """
         Function that adds/removes the asset to/from the link
         based on the item's selection state
         """
         if tree_box is self.asset_box:
-            self.toggle_asset(item, state)
+            self.toggle_asset(self.asset_model.name(index), state)
 
-    def toggle_asset(self, item, state):
+    def toggle_asset(self, item_name, state):
         """
         Function that adds/removes the asset to/from the link based
         on the item's selection state
         """
-        if not item:
+        if not item_name:
             return
-        item_name = str(item.text(0))
-        selected_link = self.get_selected_link()
+        selected_links = get_selected_list(self.link_box)
 
-        if selected_link:
+        for selected_link in selected_links:
             if state:
-                self.link_obj.add_assets_to_link(
-                                 selected_link,
-                                 [item_name]
-                                 )
+                if not self.link_obj.has_link_asset(selected_link,
+                                                    item_name):
+                    self.link_obj.add_assets_to_link(
+                                     selected_link,
+                                     [item_name]
+                                     )
             else:
-                self.link_obj.remove_assets_from_link(
-                                 selected_link,
-                                 [item_name]
-                                 )
-
-    def get_top_parent(self, item):
-        """
-        Function to get the top level parent
-        """
-        parent = item.parent()
-        while parent.parent():
-            parent = parent.parent()
-        return parent
+                if self.link_obj.has_link_asset(selected_link,
+                                                item_name):
+                    self.link_obj.remove_assets_from_link(
+                                     selected_link,
+                                     [item_name]
+                                     )
+
+        if len(selected_links) > 1:
+            self.asset_model.set_link_states(
+                self.link_obj.get_common_link_assets(selected_links),
+                self.link_obj.get_union_link_assets(selected_links))
 
     def populate_links(self):
         """
         Function to populate/refresh the links
         """
         self.clear_selections()
-        self.link_box.clear()
-        for link in self.link_obj.get_links():
-            item = QtGui.QListWidgetItem()
-            item.setText(link)
-            self.link_box.addItem(item)
+        self.link_model.reset_links()
 
     def clear_selections(self):
         """
@@ -474,6 +1078,6 @@ class LightLinkWidget(QtGui.QWidget):
         Function that deletes the selected links
         """
         link_names = get_selected_list(self.link_box)
+        self.clear_selections()
         if link_names:
-            self.link_obj.delete_links(link_names)
-        self.populate_links()
+            self.link_model.delete_links(link_names)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Tests for the light link json object edits and cached queries
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+# custom
+import light_link_object as llo
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+ASSETS = ['car', 'girl', 'house', 'tree']
+LINKS = {'key': {llo.ASSETS_TAG: ['car', 'girl']},
+         'fill': {llo.ASSETS_TAG: ['girl', 'tree']}}
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ CLASSES --#
+
+class LightLinkJsonObjectTest(unittest.TestCase):
+    """
+    Tests of the light link json object
+    """
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        json_path = os.path.join(self.temp_dir, 'lightlinks.json')
+        with open(json_path, 'w') as json_file:
+            json.dump({llo.ASSETS_TAG: ASSETS, llo.LIGHTLINK_TAG: LINKS},
+                      json_file)
+        self.link_obj = llo.LightLinkJsonObject(json_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_link_queries_take_generators(self):
+        lights = (light for light in ['key', 'fill'])
+        self.assertEqual(self.link_obj.get_union_link_assets(lights),
+                         frozenset(['car', 'girl', 'tree']))
+        lights = (light for light in ['key', 'fill'])
+        self.assertEqual(self.link_obj.get_common_link_assets(lights),
+                         frozenset(['girl']))
+        self.assertEqual(self.link_obj.get_common_link_assets(iter([])),
+                         frozenset())
+
+    def test_link_assets_are_copied(self):
+        self.assertFalse(self.link_obj.has_link_asset('key', 'tree'))
+        self.link_obj.get_link_assets('key').append('tree')
+        self.assertEqual(self.link_obj.get_link_assets('key'),
+                         ['car', 'girl'])
+
+        self.link_obj.add_assets_to_link('key', ['tree'])
+        self.assertTrue(self.link_obj.has_link_asset('key', 'tree'))
+
+    def test_edits_clear_cache(self):
+        self.link_obj.get_union_link_assets(['key'])
+        self.link_obj.get_union_link_assets(['key'])
+        self.assertEqual(self.link_obj.get_cache_stats()['hits'], 1)
+
+        self.link_obj.remove_assets_from_link('key', ['car'])
+        self.assertEqual(self.link_obj.get_cache_stats()['results'], 0)
+        self.assertEqual(self.link_obj.get_union_link_assets(['key']),
+                         frozenset(['girl']))
+
+    def test_add_assets(self):
+        self.link_obj.add_assets(['van', 'car', 'apple', 'van'])
+        self.assertEqual(self.link_obj.get_assets(),
+                         ASSETS + ['apple', 'van'])
+
+    def test_delete_assets(self):
+        self.link_obj.delete_assets(['girl', 'tree', 'missing'])
+        self.assertEqual(self.link_obj.get_assets(), ['car', 'house'])
+        self.assertEqual(self.link_obj.get_link_assets('key'), ['car'])
+        self.assertEqual(self.link_obj.get_link_assets('fill'), [])
+        self.assertFalse(self.link_obj.has_link_asset('key', 'girl'))
+
+if __name__ == '__main__':
+    unittest.main()
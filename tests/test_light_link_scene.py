@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Tests for applying light links to the scene, against a stand in cmds
+    module that records its calls
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import unittest
+
+# custom
+import light_link_object as llo
+import light_link_scene as llscene
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ CLASSES --#
+
+class RecordingCmds(object):
+    """
+    Stand in for maya.cmds holding the scene objects and light links,
+    recording the lightlink and undoInfo calls
+    """
+    def __init__(self, objects, scene_links):
+        self.objects = set(objects)
+        self.scene_links = dict((light, list(assets)) for light, assets
+                                in scene_links.iteritems())
+        self.calls = []
+
+    def ls(self, names):
+        return [name for name in names if name in self.objects]
+
+    def lightlink(self, query = False, light = None, object = None,
+                  **kwargs):
+        if query:
+            return list(self.scene_links.get(light, []))
+        if kwargs.get(llscene.MAKE_TAG):
+            self.calls.append((llscene.MAKE_TAG, light, list(object)))
+        elif kwargs.get(llscene.BREAK_TAG):
+            self.calls.append((llscene.BREAK_TAG, light, list(object)))
+
+    def undoInfo(self, openChunk = False, closeChunk = False,
+                 chunkName = None):
+        if openChunk:
+            self.calls.append(('openChunk', chunkName))
+        if closeChunk:
+            self.calls.append(('closeChunk',))
+
+class FakeLinkObject(object):
+    """
+    Light link object holding its links in memory
+    """
+    def __init__(self, assets, links):
+        self.assets = assets
+        self.links = links
+
+    def get_links(self):
+        return self.links
+
+    def get_assets(self):
+        return self.assets
+
+    def get_link_assets(self, light):
+        return self.links[light].get(llo.ASSETS_TAG)
+
+class LightLinkSceneTest(unittest.TestCase):
+    """
+    Tests of the scene link delta and how it is applied
+    """
+    def setUp(self):
+        self.link_obj = FakeLinkObject(
+                    ['car', 'girl', 'house', 'tree', 'missing'],
+                    {'key': {llo.ASSETS_TAG: ['car', 'girl', 'missing']},
+                     'fill': {llo.ASSETS_TAG: ['tree']},
+                     'rim': {},
+                     'gone': {llo.ASSETS_TAG: ['car']}})
+        self.cmds = RecordingCmds(
+                    ['key', 'fill', 'rim', 'car', 'girl', 'house', 'tree',
+                     'camera'],
+                    {'key': ['car', 'house', 'camera'],
+                     'fill': ['tree'],
+                     'rim': ['girl']})
+
+    def test_compute_link_delta(self):
+        link_delta = llscene.compute_link_delta(self.link_obj, self.cmds)
+
+        # Missing objects, unchanged lights and objects outside the asset
+        # list are left out
+        self.assertEqual(link_delta,
+                         {'key': {llscene.MAKE_TAG: ['girl'],
+                                  llscene.BREAK_TAG: ['house']},
+                          'rim': {llscene.MAKE_TAG: [],
+                                  llscene.BREAK_TAG: ['girl']}})
+        self.assertEqual(self.cmds.calls, [])
+
+    def test_apply_link_delta_chunks(self):
+        link_delta = {'key': {llscene.MAKE_TAG: ['a', 'b', 'c', 'd', 'e'],
+                              llscene.BREAK_TAG: ['f']},
+                      'fill': {llscene.MAKE_TAG: [],
+                               llscene.BREAK_TAG: ['g', 'h', 'i']}}
+        llscene.apply_link_delta(link_delta, self.cmds, chunk_size = 2)
+
+        self.assertEqual(self.cmds.calls,
+                         [('openChunk', llscene.UNDO_CHUNK_NAME),
+                          (llscene.BREAK_TAG, 'fill', ['g', 'h']),
+                          (llscene.BREAK_TAG, 'fill', ['i']),
+                          (llscene.MAKE_TAG, 'key', ['a', 'b']),
+                          (llscene.MAKE_TAG, 'key', ['c', 'd']),
+                          (llscene.MAKE_TAG, 'key', ['e']),
+                          (llscene.BREAK_TAG, 'key', ['f']),
+                          ('closeChunk',)])
+
+    def test_apply_link_delta_closes_chunk_on_error(self):
+        def fail(**kwargs):
+            raise RuntimeError('lightlink failed')
+        self.cmds.lightlink = fail
+
+        link_delta = {'key': {llscene.MAKE_TAG: ['car'],
+                              llscene.BREAK_TAG: []}}
+        with self.assertRaises(RuntimeError):
+            llscene.apply_link_delta(link_delta, self.cmds)
+        self.assertEqual(self.cmds.calls,
+                         [('openChunk', llscene.UNDO_CHUNK_NAME),
+                          ('closeChunk',)])
+
+    def test_apply_links_to_scene(self):
+        link_delta = llscene.apply_links_to_scene(self.link_obj, self.cmds)
+
+        self.assertEqual(sorted(link_delta), ['key', 'rim'])
+        self.assertEqual(self.cmds.calls,
+                         [('openChunk', llscene.UNDO_CHUNK_NAME),
+                          (llscene.MAKE_TAG, 'key', ['girl']),
+                          (llscene.BREAK_TAG, 'key', ['house']),
+                          (llscene.BREAK_TAG, 'rim', ['girl']),
+                          ('closeChunk',)])
+
+    def test_apply_links_to_scene_without_changes(self):
+        self.cmds.scene_links = {'key': ['car', 'girl'],
+                                 'fill': ['tree']}
+
+        self.assertEqual(llscene.apply_links_to_scene(self.link_obj,
+                                                      self.cmds), {})
+        self.assertEqual(self.cmds.calls, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------- HEADER --#
+
+"""
+:author:
+    Fermi Perumal
+
+:description:
+    Tests for the light link list and asset models, run on Qt's offscreen
+    platform:
+    python -m unittest discover -s tests -t .
+
+"""
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ IMPORTS --#
+
+# Built-in
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+# The models are tested without a display
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+# third-party
+try:
+    from PyQt4 import QtGui
+except ImportError:
+    QtGui = None
+
+# custom
+import light_link_object as llo
+if QtGui is not None:
+    import light_linker_ui as llui
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ GLOBALS --#
+
+ASSETS = ['car', 'girl', 'house', 'tree', 'van']
+LINKS = {'key': {llo.ASSETS_TAG: ['car', 'girl']},
+         'fill': {llo.ASSETS_TAG: ['tree']}}
+
+#-----------------------------------------------------------------------------#
+#---------------------------------------------------------------- FUNCTIONS --#
+
+def get_application():
+    """
+    Returns the running QApplication, creating one if needed
+    """
+    return QtGui.QApplication.instance() or QtGui.QApplication([])
+
+def record_rows(signal):
+    """
+    Returns a list that the first and last rows of a row signal are
+    appended to
+    """
+    rows = []
+    signal.connect(lambda parent, first, last: rows.append((first, last)))
+    return rows
+
+def record_calls(signal):
+    """
+    Returns a list that each emit of a signal is appended to
+    """
+    calls = []
+    signal.connect(lambda: calls.append(True))
+    return calls
+
+def get_selection_ranges(selection):
+    """
+    Returns the top and bottom rows of each range of a selection
+    """
+    return [(selection[i].top(), selection[i].bottom())
+            for i in range(selection.count())]
+
+#-----------------------------------------------------------------------------#
+#------------------------------------------------------------------ CLASSES --#
+
+class LightLinkModelTestCase(unittest.TestCase):
+    """
+    Base test case with a light link json object read from a temp file
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.app = get_application()
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        json_path = os.path.join(self.temp_dir, 'lightlinks.json')
+        with open(json_path, 'w') as json_file:
+            json.dump({llo.ASSETS_TAG: ASSETS, llo.LIGHTLINK_TAG: LINKS},
+                      json_file)
+        self.link_obj = llo.LightLinkJsonObject(json_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+@unittest.skipIf(QtGui is None, 'PyQt4 is not available')
+class LightLinkListModelTest(LightLinkModelTestCase):
+    """
+    Tests of the light link list model
+    """
+    def setUp(self):
+        super(LightLinkListModelTest, self).setUp()
+        self.model = llui.LightLinkListModel(self.link_obj)
+        self.inserted = record_rows(self.model.rowsInserted)
+        self.removed = record_rows(self.model.rowsRemoved)
+
+    def test_rows(self):
+        self.assertEqual(self.model.rowCount(), 2)
+        self.assertEqual(self.model.data(self.model.index(0, 0)), 'fill')
+        self.assertEqual(self.model.name(self.model.index(1, 0)), 'key')
+        self.assertIsNone(self.model.name(llui.QModelIndex()))
+
+    def test_add_link(self):
+        self.model.add_link('back')
+        self.assertEqual(self.inserted, [(0, 0)])
+        self.assertEqual(self.model.rowCount(), 3)
+        self.assertIn('back', self.link_obj.get_links())
+
+        # Existing links aren't added again
+        self.model.add_link('key')
+        self.assertEqual(self.inserted, [(0, 0)])
+
+    def test_rename_link(self):
+        self.model.rename_link('fill', 'rim')
+        self.assertEqual(self.removed, [(0, 0)])
+        self.assertEqual(self.inserted, [(1, 1)])
+        self.assertEqual(self.model.name(self.model.index(1, 0)), 'rim')
+        self.assertEqual(self.link_obj.get_link_assets('rim'), ['tree'])
+
+    def test_delete_links(self):
+        self.model.delete_links(['key', 'fill'])
+        self.assertEqual(self.removed, [(1, 1), (0, 0)])
+        self.assertEqual(self.model.rowCount(), 0)
+        self.assertEqual(len(self.link_obj.get_links()), 0)
+
+@unittest.skipIf(QtGui is None, 'PyQt4 is not available')
+class LightLinkAssetModelTest(LightLinkModelTestCase):
+    """
+    Tests of the light link asset model
+    """
+    def setUp(self):
+        super(LightLinkAssetModelTest, self).setUp()
+        self.model = llui.LightLinkAssetModel(self.link_obj)
+        self.root = self.model.root_index()
+        self.inserted = record_rows(self.model.rowsInserted)
+        self.removed = record_rows(self.model.rowsRemoved)
+        self.resets = record_calls(self.model.modelReset)
+
+    def get_names(self):
+        return [self.model.name(self.model.index(row, 0, self.root))
+                for row in range(self.model.rowCount(self.root))]
+
+    def set_filter(self, text):
+        self.model.set_filter(self.model.search_index.search(text))
+        del self.resets[:]
+
+    def test_rows(self):
+        self.assertEqual(self.model.rowCount(), 1)
+        self.assertEqual(self.model.rowCount(self.root), len(ASSETS))
+        self.assertEqual(self.model.data(self.root), llui.ASSET_LABEL)
+        self.assertIsNone(self.model.name(self.root))
+        self.assertEqual(self.model.data(self.model.index(1, 0, self.root)),
+                         'girl')
+        self.assertEqual(self.get_names(), ASSETS)
+
+    def test_add_assets(self):
+        self.model.add_assets(['zed', 'apple', 'car'])
+        self.assertEqual(self.inserted, [(5, 6)])
+        self.assertEqual(self.get_names(), ASSETS + ['apple', 'zed'])
+        self.assertEqual(self.model.asset_index('zed').row(), 6)
+
+    def test_add_assets_filtered(self):
+        self.set_filter('a')
+        self.model.add_assets(['apple'])
+        self.assertEqual(self.inserted, [])
+        self.assertEqual(self.get_names(), ['car', 'van'])
+        self.assertIn('apple', self.link_obj.get_assets())
+
+    def test_delete_assets_range(self):
+        self.model.delete_assets(['house', 'girl'])
+        self.assertEqual(self.removed, [(1, 2)])
+        self.assertEqual(self.resets, [])
+        self.assertEqual(self.get_names(), ['car', 'tree', 'van'])
+        self.assertEqual(self.link_obj.get_link_assets('key'), ['car'])
+
+    def test_delete_assets_scattered(self):
+        self.model.delete_assets(['car', 'house'])
+        self.assertEqual(self.removed, [])
+        self.assertEqual(len(self.resets), 1)
+        self.assertEqual(self.get_names(), ['girl', 'tree', 'van'])
+        self.assertEqual(self.link_obj.get_link_assets('key'), ['girl'])
+
+    def test_delete_assets_filtered(self):
+        self.set_filter('a')
+        self.model.delete_assets(['van', 'tree'])
+        self.assertEqual(self.removed, [(1, 1)])
+        self.assertEqual(self.get_names(), ['car'])
+        self.assertEqual(self.link_obj.get_assets(), ['car', 'girl', 'house'])
+        self.assertEqual(self.link_obj.get_link_assets('fill'), [])
+
+    def test_asset_selection(self):
+        selection = self.model.asset_selection(['tree', 'car', 'girl',
+                                                'missing'])
+        self.assertEqual(get_selection_ranges(selection), [(0, 1), (3, 3)])
+
+    def test_asset_selection_filtered(self):
+        self.set_filter('a')
+        selection = self.model.asset_selection(['car', 'van', 'girl'])
+        self.assertEqual(get_selection_ranges(selection), [(0, 1)])
+
+if __name__ == '__main__':
+    unittest.main()